@@ -0,0 +1,110 @@
+#!/bin/env python3
+"""Branch code lookup, thefuzz's extractOne over the whole branch master against BranchIndex.
+
+A synthetic branch master is built from address-like tokens, and branches are looked up as they
+come out of policies: copies of master addresses with words dropped, swapped or misspelt, and
+addresses that aren't in the master at all. Every lookup is checked to find the same address and
+score as extractOne.
+
+    python benchmarks/bench_branch_index.py --branches 5000 --lookups 500
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from thefuzz import fuzz, process  # noqa: E402
+
+from branches import BranchIndex  # noqa: E402
+
+
+WORDS = [
+    "Road", "Street", "Nagar", "Colony", "Floor", "Building", "Tower", "Complex", "Opp", "Near",
+    "Main", "Cross", "Sector", "Phase", "Plot", "No", "Office", "Branch", "Division", "Regional",
+    "Mumbai", "Pune", "Chennai", "Delhi", "Kolkata", "Bengaluru", "Hyderabad", "Ahmedabad",
+    "Jaipur", "Lucknow", "Nagpur", "Indore", "Bhopal", "Patna", "Surat", "Kochi", "Mysuru",
+    "M.G.", "S.V.", "Gandhi", "Nehru", "Station", "Market", "Chowk", "Bazar", "Lane", "Marg",
+    "Maharashtra", "Karnataka", "Tamil", "Nadu", "Gujarat", "Rajasthan", "Kerala", "Bihar",
+    "Café", "Ōkubo", "&", "-", "(West)", "(East)", "1st", "2nd", "3rd",
+]
+
+
+def address(rng):
+    words = rng.choices(WORDS, k=rng.randint(3, 10))
+    words.insert(rng.randint(0, len(words)), str(rng.randint(1, 999)))
+    words.append(str(rng.randint(400000, 799999)))
+    return " ".join(words)
+
+
+def perturb(rng, text):
+    words = text.split()
+    for _ in range(rng.randint(0, 3)):
+        change = rng.random()
+        i = rng.randrange(len(words))
+        if change < 0.3 and len(words) > 1:
+            del words[i]
+        elif change < 0.6:
+            j = rng.randrange(len(words))
+            words[i], words[j] = words[j], words[i]
+        elif words[i]:
+            k = rng.randrange(len(words[i]))
+            words[i] = words[i][:k] + rng.choice("aeioux") + words[i][k + 1 :]
+    return " ".join(words)
+
+
+def lookups(rng, addresses, count):
+    branches = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            branches.append(perturb(rng, rng.choice(addresses)))
+        elif kind < 0.9:
+            branches.append(address(rng))
+        else:
+            branches.append(rng.choice(["", "-", "N/A", "Head Office", "Ōkubo"]))
+    return branches
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--branches", type=int, default=5000, help="Addresses in the master")
+    arg_parser.add_argument("--lookups", type=int, default=500, help="Branches looked up")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    # extractOne warns about every query that processes to nothing
+    logging.getLogger("thefuzz").setLevel(logging.ERROR)
+
+    rng = random.Random(args.seed)
+    master = {address(rng): str(code) for code in range(args.branches)}
+    branches = lookups(rng, list(master), args.lookups)
+
+    start = time.perf_counter()
+    expected = [process.extractOne(branch, master.keys(), scorer=fuzz.token_sort_ratio) for branch in branches]
+    extract_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = BranchIndex(master.keys())
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [index.match(branch) for branch in branches]
+    indexed = time.perf_counter() - start
+
+    mismatches = [(b, e, f) for b, e, f in zip(branches, expected, found) if e != f]
+    for branch, want, got in mismatches[:10]:
+        print(f"Mismatch for {branch!r}: extractOne {want}, index {got}")
+
+    print(f"Master: {len(master)} addresses, {len(branches)} lookups")
+    print(f"extractOne:  {extract_one:.3f}s")
+    print(f"BranchIndex: {indexed:.3f}s (+{build:.3f}s to build), {extract_one / indexed:.1f}x")
+    print(f"Mismatches:  {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
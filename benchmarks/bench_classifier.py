@@ -0,0 +1,90 @@
+#!/bin/env python3
+"""Insurer detection cost as insurers are added, if/elif chain against the classifier.
+
+Synthetic insurers are registered on top of the real ones and a corpus is built from copies of the
+text of the samples in pdf/. Documents with no signature are the worst case for both, since every
+signature has to be tried over the whole text.
+
+    python benchmarks/bench_classifier.py --copies 20
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parsers import insurer_classifier  # noqa: E402
+from parsers.base import BasePolicyParser  # noqa: E402
+from parsers.reader import PdfReader  # noqa: E402
+
+
+SYNTHETIC_NAMES = ["Acme", "Zenith", "Bharat", "Kaveri", "Everest", "Sahyadri", "Ganga", "Vindhya"]
+
+
+def read_corpus(files, copies):
+    texts = []
+    for file in files:
+        try:
+            texts.append(PdfReader(file).read_file_pypdf())
+        except Exception as e:
+            print(f"Skipping {os.path.basename(file)}, {e}")
+    # Strip the real signatures, so every document needs a full scan
+    unidentified = [re.sub(r"SBI|New\s*India|ICICI", "XXX", text, flags=re.I) for text in texts]
+    return unidentified * copies
+
+
+def build_classifier(extra_insurers):
+    classifier = insurer_classifier.copy()
+    for index in range(extra_insurers):
+        name = SYNTHETIC_NAMES[index % len(SYNTHETIC_NAMES)] + str(index)
+        synthetic = type(name, (BasePolicyParser,), {})
+        synthetic.SIGNATURES = [
+            rf"Welcome\s*to\s*{name}\s*General",
+            rf"Thank\s*you\s*for\s*choosing\s*{name}\s*Insurance",
+        ]
+        classifier.register(synthetic)
+    return classifier
+
+
+def classify_chain(classifier, content):
+    # What get_policy_parser used to do, one re.search per signature, in registration order
+    for parser_class, signature in classifier._signatures:
+        if re.search(signature, content, flags=re.I):
+            return parser_class
+    return None
+
+
+def time_corpus(func, corpus):
+    start = time.perf_counter()
+    for content in corpus:
+        func(content)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", "-c", type=int, default=10, help="Copies of each sample in the corpus")
+    parser.add_argument(
+        "--insurers", "-i", type=int, nargs="*", default=[0, 10, 30, 100], help="Synthetic insurers to add"
+    )
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "pdf", "*")))
+    corpus = read_corpus(files, args.copies)
+    size = sum(map(len, corpus)) / 1024 / 1024
+    print(f"{len(corpus)} documents, {size:.1f} MB of text\n")
+
+    print(f"{'insurers':>8} {'signatures':>10} {'chain':>9} {'classifier':>10}")
+    for extra in args.insurers:
+        classifier = build_classifier(extra)
+        chain = time_corpus(lambda content: classify_chain(classifier, content), corpus)
+        combined = time_corpus(classifier.classify, corpus)
+        insurers = len({parser_class for parser_class, _ in classifier._signatures})
+        print(f"{insurers:>8} {len(classifier._signatures):>10} {chain:>8.3f}s {combined:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
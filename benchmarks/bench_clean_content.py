@@ -0,0 +1,77 @@
+#!/bin/env python3
+"""PdfReader.clean_content against the chained cleaning it replaced, with an identical output check.
+
+Runs both over the raw pypdf text of every page of the given PDFs, and over generated text mixing
+every character below 300, surrogates, rupee signs and "&amp;" sequences. Any page cleaned
+differently fails the run.
+
+    python benchmarks/bench_clean_content.py pdf/*.pdf --repeat 50
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PyPDF2 import PdfReader as pyPdfReader  # noqa: E402
+
+from parsers.reader import SPECIAL_CHARS_MAPPING, PdfReader  # noqa: E402
+
+
+def legacy_clean_content(content):
+    content = content.encode("ascii", errors="ignore").decode().translate(SPECIAL_CHARS_MAPPING)
+    return content.replace("&amp;", "&").replace("\xa0", " ").replace("\x18", " ").replace("\x08", " ")
+
+
+def raw_pages(files):
+    pages = []
+    for file in files:
+        try:
+            pages.extend(page.extract_text() for page in pyPdfReader(file).pages)
+        except Exception as e:
+            print(f"Skipping {os.path.basename(file)}, {e}")
+    return pages
+
+
+def generated_pages(rng, count):
+    alphabet = [chr(c) for c in range(300)] + ["\ud800", "\udfff", "₹", "&amp;", "&am\x18p;", "&amp;amp;"]
+    return ["".join(rng.choices(alphabet, k=rng.randint(0, 2000))) for _ in range(count)]
+
+
+def timed(clean, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            clean(page)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("files", nargs="*", help="PDF files, all of pdf/ by default")
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    arg_parser.add_argument("--generated", type=int, default=500, help="Generated pages to check")
+    args = arg_parser.parse_args()
+
+    files = args.files or glob.glob(os.path.join(os.path.dirname(__file__), "..", "pdf", "*"))
+    pages = raw_pages(files)
+    clean_content = PdfReader(None).clean_content
+
+    checked = pages + generated_pages(random.Random(0), args.generated)
+    different = [page for page in checked if clean_content(page) != legacy_clean_content(page)]
+    print(f"Identical: {len(checked) - len(different)}/{len(checked)} pages")
+
+    legacy = timed(legacy_clean_content, pages, args.repeat)
+    current = timed(clean_content, pages, args.repeat)
+    size = sum(map(len, pages)) * args.repeat / 1024 / 1024
+    print(f"{len(pages)} pages x {args.repeat}, {size:.1f}M characters")
+    print(f"chained:     {legacy:.3f}s")
+    print(f"single pass: {current:.3f}s, {legacy / current:.1f}x")
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
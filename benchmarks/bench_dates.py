@@ -0,0 +1,126 @@
+#!/bin/env python3
+"""Date formatting, dateparser against DateNormalizer, with golden cases.
+
+The golden cases are the date strings the SBI, New India and ICICI Lombard patterns capture, after
+PolicyParser.clean_text, with the formatted date each should give. Every case is checked against
+DateNormalizer and dateparser; a DateNormalizer mismatch fails the run. Cases where dateparser
+differs on purpose are marked, and reported rather than failed.
+
+    python benchmarks/bench_dates.py --rows 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dates import APPLICABLE_DATE_FORMATS, DateNormalizer  # noqa: E402
+
+
+# (captured text, expected, dateparser agrees)
+GOLDEN = [
+    # SBI, ([\d\/]+) after Period of Insurance, Policy Start/End Date and Receipt Date
+    ("16/07/2022", "07/16/2022", True),
+    ("15/07/2023", "07/15/2023", True),
+    ("01/12/2021", "12/01/2021", True),
+    ("1/7/2022", "07/01/2022", True),
+    ("16/07/2022/", "07/16/2022", True),
+    ("/16/07/2022", "07/16/2022", True),
+    ("29/02/2024", "02/29/2024", True),
+    ("31/02/2022", None, True),
+    ("16/07/20221", None, True),
+    ("/", None, True),
+    # New India, ([\d\/]+) after Period of cover and Date of Issue
+    ("30/11/2021", "11/30/2021", True),
+    ("01/12/2021/", "12/01/2021", False),
+    ("16/07/22", "07/16/2022", True),
+    ("07/16/2022", "07/16/2022", True),
+    ("05/07/22", "07/05/2022", False),
+    # ICICI Lombard, month names after Policy Issued On, midnight of and Receipt Date
+    ("JUL 16, 2022", "07/16/2022", True),
+    ("JULY 16, 2022", "07/16/2022", True),
+    ("JULY 16,2022", "07/16/2022", True),
+    ("JUL 6, 2022", "07/06/2022", True),
+    ("SEPT 16, 2022", "09/16/2022", True),
+    ("JUNE 16, 2022", "06/16/2022", True),
+    ("JULY 16 2022", "07/16/2022", True),
+    ("16-JUL-2022", "07/16/2022", True),
+    ("16 JUL, 2022", "07/16/2022", True),
+    ("16 JULY 2022", "07/16/2022", True),
+    ("16-07-2022", "07/16/2022", True),
+    ("JULY 16, 2022 RECEIPT", None, True),
+    # Relative dates dateparser fills in from today are not dates here
+    ("16/07", None, False),
+    ("12", None, False),
+]
+
+
+def check_golden(normalizer, dt_parse):
+    failures = 0
+    for text, expected, agrees in GOLDEN:
+        try:
+            found = normalizer.format(text)
+        except ValueError:
+            found = None
+        parsed = dt_parse(text, date_formats=APPLICABLE_DATE_FORMATS)
+        legacy = parsed.strftime("%m/%d/%Y") if parsed else None
+
+        if found != expected:
+            failures += 1
+            print(f"FAIL {text!r}: expected {expected}, got {found}")
+        elif (legacy == expected) != agrees:
+            print(f"NOTE {text!r}: dateparser gives {legacy}, expected {expected}")
+    print(f"Golden cases: {len(GOLDEN) - failures}/{len(GOLDEN)} passed")
+    return failures
+
+
+def rows_of_dates(rng, count):
+    """The 5 date fields of count rows, policies issued over a couple of years"""
+    dates = [text for text, expected, _ in GOLDEN if expected]
+    rows = []
+    for _ in range(count):
+        day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.choice([2021, 2022, 2023])
+        start = f"{day:02}/{month:02}/{year}"
+        rows.append([start, f"{day:02}/{month:02}/{year + 1}", start, start, rng.choice(dates)])
+    return rows
+
+
+def timed(format_date, rows):
+    start = time.perf_counter()
+    for row in rows:
+        for text in row:
+            format_date(text)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=2000, help="Rows of dates to format")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    from dateparser import parse as dt_parse
+
+    import_time = time.perf_counter() - start
+
+    failures = check_golden(DateNormalizer(APPLICABLE_DATE_FORMATS), dt_parse)
+
+    rows = rows_of_dates(random.Random(args.seed), args.rows)
+    legacy = timed(lambda text: dt_parse(text, date_formats=APPLICABLE_DATE_FORMATS).strftime("%m/%d/%Y"), rows)
+    cold = timed(lambda text: DateNormalizer(APPLICABLE_DATE_FORMATS).format(text), rows)
+    normalizer = DateNormalizer(APPLICABLE_DATE_FORMATS)
+    memoized = timed(normalizer.format, rows)
+
+    calls = args.rows * len(rows[0])
+    print(f"{calls} dates in {args.rows} rows, dateparser import {import_time:.3f}s")
+    print(f"dateparser:                 {legacy:.3f}s")
+    print(f"DateNormalizer, no memo:    {cold:.3f}s, {legacy / cold:.1f}x")
+    print(f"DateNormalizer, memoized:   {memoized:.3f}s, {legacy / memoized:.1f}x")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/bin/env python3
+"""Regex time per policy for the get_* fields, full content scans against the anchor index.
+
+The text of each sample is extracted once, then every field getter is timed on a fresh parser with
+RegexPolicyParser.USE_ANCHOR_INDEX off and on. Both modes must extract identical values, and no
+pattern list may run more than once per policy (RegexPolicyParser.pattern_runs).
+
+    python benchmarks/bench_field_extraction.py --repeat 20
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parsers import get_policy_parser  # noqa: E402
+from parsers.base import BasePolicyParser  # noqa: E402
+
+FIELDS = [name for name in vars(BasePolicyParser) if name.startswith("get_") and name != "get_insurer"]
+
+
+def extract_fields(parser_class, content, use_anchor_index):
+    policy = parser_class(content)
+    policy.USE_ANCHOR_INDEX = use_anchor_index
+    values = {field: getattr(policy, field)() for field in FIELDS}
+
+    # transform_to_saibaa asks for some fields several times, none of them may be extracted twice
+    for field in FIELDS:
+        getattr(policy, field)()
+    reruns = [pattern_list for pattern_list, runs in policy.pattern_runs.items() if runs > 1]
+    if reruns:
+        sys.exit(f"{parser_class.__name__}: patterns ran more than once, {[p.pattern for p in reruns[0]]}")
+
+    return values
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="PDF files, defaults to the samples in pdf/")
+    parser.add_argument("--repeat", "-r", type=int, default=10, help="Runs per file, best is reported")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "pdf", "*")))
+
+    print(f"{'file':<20} {'parser':<26} {'full scan':>10} {'indexed':>10} {'speedup':>8}")
+    for file in files:
+        try:
+            policy = get_policy_parser(file)
+        except Exception as e:
+            print(f"{os.path.basename(file):<20} skipped, {e}")
+            continue
+        parser_class = policy.__class__
+        if parser_class is BasePolicyParser:
+            continue
+
+        full = extract_fields(parser_class, policy.content, False)
+        indexed = extract_fields(parser_class, policy.content, True)
+        if full != indexed:
+            differences = {field: (full[field], indexed[field]) for field in FIELDS if full[field] != indexed[field]}
+            sys.exit(f"{os.path.basename(file)}: anchor index changed extracted values {differences}")
+
+        before = best_of(lambda: extract_fields(parser_class, policy.content, False), args.repeat)
+        after = best_of(lambda: extract_fields(parser_class, policy.content, True), args.repeat)
+        print(
+            f"{os.path.basename(file):<20} {parser_class.__name__:<26} "
+            f"{before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {before / after:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/bin/env python3
+"""Per-file wall clock of the ICICI Lombard read path, before and after page selection.
+
+The old path read the file from disk twice and ran pdfminer over every page, the new one parses
+a single in-memory copy and only runs pdfminer over the pages selected by
+`IciciLombardPolicyParser.PDFMINER_PAGES_PATTERN` (and the page after each). The ICICI fields are
+extracted from both texts and compared, any difference is listed.
+
+The samples in pdf/ are all SBI policies, --synthetic-icici writes an ICICI Lombard policy with
+the schedule on its first two pages followed by the given number of pages of policy wording, and
+adds it to the files.
+
+    python benchmarks/bench_reader.py pdf/*.pdf
+    python benchmarks/bench_reader.py --synthetic-icici 20
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pdfminer.high_level import extract_text  # noqa: E402
+from pdfminer.layout import LAParams  # noqa: E402
+
+from parsers import PDFMINER_MARKER  # noqa: E402
+from parsers.icici_lombard import IciciLombardPolicyParser  # noqa: E402
+from parsers.reader import PdfReader  # noqa: E402
+
+ICICI_SCHEDULE = [
+    [
+        "Thank you for choosing ICICI Lombard",
+        "Dear RAHUL SHARMA,",
+        "Private Car Package Policy",
+        "Enclosed Policy No: 3001/123456789/00/000",
+        "Insured Name: RAHUL SHARMA Policy Issued On : March 10, 2024",
+        "Address Partner Code 12 MG ROAD BANGALORE CB69117",
+        "Mobile No: 9876543210",
+        "RTO Location: KARNATAKA-BANGALORE",
+        "Registration No: KA01AB1234",
+        "Make MARUTI Trailer",
+        "Model SWIFT VXI Non",
+        "Type of Body Hatchback Mfg Yr",
+        "Hatchback 5 2020",
+    ],
+    [
+        "Total IDV (`) 450000",
+        "No Claim Bonus: 20 %",
+        "March 11, 2024 00:00 to midnight of March 10, 2025",
+        "Total Own Damage Premium (A): 5000",
+        "Total Liability Premium (B): 3000",
+        "Total Package Premium (A+B): 8000",
+        "Total Tax Payable in `: 1440",
+        "Total Premium Payable: 9440",
+        "Premium Collection No: 778899",
+        "Receipt Date 10-Mar-2024",
+        "Policy Issuing Office: MUMBAI Agent",
+    ],
+]
+
+# Policy wording, carrying the generic labels (Address, Premium, Make, Policy No) on every page
+ICICI_WORDING = [
+    "Section {page}: General conditions",
+    "Notice shall be given in writing to the address of the Company mentioned in the Policy No.",
+    "The premium is payable in full before the commencement of cover. Any additional premium",
+    "for a change of make or model of the vehicle shall be paid at the rates in force.",
+    "The Registration No of the vehicle shall be that recorded with the registering authority.",
+    "No claim shall be payable where the vehicle is used otherwise than in accordance with the",
+    "limitations as to use. The Insured shall take all reasonable steps to safeguard the vehicle.",
+]
+
+
+def pdf_string(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """Write a PDF with a page per list of lines, in Helvetica"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for lines in pages:
+        text = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({pdf_string(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text.encode("latin-1")))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >>"
+            b" /Contents %d 0 R >>" % len(objects)
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(pages))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(output)
+
+
+def synthetic_icici(directory, wording_pages):
+    path = os.path.join(directory, f"icici-{wording_pages}.pdf")
+    wording = [[line.format(page=page + 1) for line in ICICI_WORDING] for page in range(wording_pages)]
+    write_pdf(path, ICICI_SCHEDULE + wording)
+    return path
+
+
+def read_twice(file):
+    reader = PdfReader(file)
+    content = reader.read_file_pypdf()
+    return content + PDFMINER_MARKER + reader.clean_content(extract_text(file, laparams=LAParams()))
+
+
+def read_once(file):
+    reader = PdfReader(file)
+    content = reader.read_file_pypdf()
+    page_numbers = reader.find_pages(
+        IciciLombardPolicyParser.PDFMINER_PAGES_PATTERN, following=IciciLombardPolicyParser.PDFMINER_FOLLOWING_PAGES
+    )
+    return content + PDFMINER_MARKER + reader.read_file_pdfminer(page_numbers)
+
+
+def icici_fields(content):
+    policy = IciciLombardPolicyParser(content)
+    return {name: getattr(policy, name)() for name in dir(policy) if name.startswith("get_")}
+
+
+def best_of(func, file, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(file)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="PDF files, defaults to the samples in pdf/")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="Runs per file, best is reported")
+    parser.add_argument(
+        "--synthetic-icici", type=int, metavar="PAGES", help="Add an ICICI Lombard policy with PAGES pages of wording"
+    )
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "pdf", "*")))
+    with tempfile.TemporaryDirectory() as directory:
+        if args.synthetic_icici is not None:
+            files = [*(args.files or []), synthetic_icici(directory, args.synthetic_icici)]
+
+        print(f"{'file':<20} {'pages':>5} {'selected':>8} {'before':>8} {'after':>8} {'saving':>7} {'fields':>7}")
+        for file in files:
+            reader = PdfReader(file)
+            try:
+                reader.read_file_pypdf()
+            except Exception as e:
+                print(f"{os.path.basename(file):<20} skipped, {e}")
+                continue
+            selected = (
+                reader.find_pages(
+                    IciciLombardPolicyParser.PDFMINER_PAGES_PATTERN,
+                    following=IciciLombardPolicyParser.PDFMINER_FOLLOWING_PAGES,
+                )
+                or reader.pages
+            )
+
+            before = best_of(read_twice, file, args.repeat)
+            after = best_of(read_once, file, args.repeat)
+            expected, found = icici_fields(read_twice(file)), icici_fields(read_once(file))
+            changed = [name for name in expected if expected[name] != found[name]]
+            print(
+                f"{os.path.basename(file):<20} {len(reader.pages):>5} {len(selected):>8} "
+                f"{before:>7.2f}s {after:>7.2f}s {1 - after / before:>6.0%} {'same' if not changed else 'DIFFER':>7}"
+            )
+            for name in changed:
+                print(f"    {name}: {expected[name]!r} != {found[name]!r}")
+
+
+if __name__ == "__main__":
+    main()
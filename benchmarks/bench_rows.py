@@ -0,0 +1,132 @@
+#!/bin/env python3
+"""Memory and time of SAIBA rows, the old per-policy dict against SaibaRow.
+
+Builds rows the way transform_to_saibaa does, with distinct extracted values per row and the
+defaults shared, keeps them all alive and measures the memory they hold with tracemalloc. Time is
+measured separately, building each row and turning it into the values a writer writes.
+
+    python benchmarks/bench_rows.py --rows 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parse_policy import SAIBA_DEFAULTS, SAIBA_HEADERS, SaibaRow  # noqa: E402
+from writers.base import DictWriter  # noqa: E402
+
+
+def extracted_fields(i):
+    """The columns transform_to_saibaa fills from a policy"""
+    return {
+        "CustName": f"MR CUSTOMER {i}",
+        "Address": f"HOUSE NO {i}, RAM NAGAR, FARIDABAD, HARYANA 121106",
+        "MobileNo": f"98{i:08}",
+        "City": "FARIDABAD",
+        "State": "HARYANA",
+        "Ref/POS/MISP": "Ref",
+        "InsurerSAIBA": "SBI General Insurance Company Limited",
+        "PolicyTypeSAIBA": "Package",
+        "VehicleNo": f"HR51AB{i % 10000:04}",
+        "Make": "MARUTI",
+        "Model": "SWIFT",
+        "Variant": "VXI",
+        "YearofMan": "2019",
+        "NCB": "20",
+        "ODD": f"{i % 9000 + 1000}",
+        "StartDate": "07/16/2022",
+        "ExpiryDate": "07/15/2023",
+        "PolicyNo": f"{1000000000 + i}",
+        "PolicyIssueDate": "07/15/2022",
+        "SumInsured": f"{i % 500000 + 100000}",
+        "ODNetPremium": f"{i % 9000 + 1000}",
+        "Tp/Terroisem Prem": "2094",
+        "GST/TaxAmount": f"{i % 900 + 100}",
+        "GrossPrem": f"{i % 9000 + 4000}",
+        "TranAmt": f"{i % 9000 + 3000}",
+        "TranDated": "07/15/2022",
+        "GST/TaxRate": "18",
+        "ReceiptNo": f"{2000000 + i}",
+        "PremiumReceiptNo": f"{2000000 + i}",
+        "PremiumReceiptDate": "07/15/2022",
+        "InsurerBranchAutoCodeSAIBA": "1041",
+        "VerticalType": "Retail",
+        "BusinessType": "Service",
+        "OrgType": "individual",
+        "PolicyReceiveDate": "10/18/2026",
+        "BusPropDate": "10/18/2026",
+    }
+
+
+def dict_row(i):
+    row = {**extracted_fields(i), **SAIBA_DEFAULTS}
+    row["file"] = f"policy_{i}.pdf"
+    row["Sno"] = i + 1
+    return row
+
+
+def saiba_row(i):
+    row = SaibaRow.from_dict(extracted_fields(i))
+    row["file"] = f"policy_{i}.pdf"
+    row["Sno"] = i + 1
+    return row
+
+
+def measure_memory(build, count):
+    gc.collect()
+    tracemalloc.start()
+    rows = [build(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return size
+
+
+class NullDictWriter(DictWriter):
+    """Keeps nothing, only row_values is timed"""
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def write_headers(self, headers):
+        pass
+
+    def write_rows(self, rows):
+        pass
+
+
+def measure_time(build, count):
+    writer = NullDictWriter(os.devnull)
+    writer.add_headers(SAIBA_HEADERS)
+    start = time.perf_counter()
+    for i in range(count):
+        writer.row_values(build(i))
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    per_100k = 100000 / args.rows
+    for name, build in [("dict", dict_row), ("SaibaRow", saiba_row)]:
+        # Warm up, so first use allocations aren't counted
+        measure_memory(build, 10)
+        size = measure_memory(build, args.rows)
+        elapsed = measure_time(build, args.rows)
+        print(
+            f"{name:<10}{size / 1024 / 1024 * per_100k:>8.1f}MB per 100k rows"
+            f"{size / args.rows:>8.0f}B per row{elapsed / args.rows * 1e6:>8.1f}us per row"
+        )
+
+
+if __name__ == "__main__":
+    main()
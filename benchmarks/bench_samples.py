@@ -0,0 +1,236 @@
+#!/bin/env python3
+"""Stage timings, golden output check and throughput over the sample policies in pdf/.
+
+Every sample is parsed with the profiler enabled and timed per stage: pypdf and pdfminer extraction,
+insurer detection, each get_* field and transform_to_saibaa. Both extractors are also timed over
+the whole document for every sample, pdfminer otherwise only runs for some insurers.
+
+The SAIBA rows (or errors) of the samples are compared with benchmarks/golden/samples.json, built
+with the branch master in benchmarks/golden/branches.csv. Any difference fails the run, rerun with
+--update-golden after an intended change to the output.
+
+The corpus is then scaled to --documents by replaying the text extracted from the samples with
+amounts and long numbers changed at random, parsed like --from-text parses text. Throughput in
+documents per second is compared with --baseline when it exists and the run fails when it dropped
+by more than --threshold. Baselines only compare on the machine they were saved on, save one with
+--save-baseline.
+
+    python benchmarks/bench_samples.py --documents 2000 --baseline /tmp/samples.json --save-baseline
+    python benchmarks/bench_samples.py --documents 2000 --baseline /tmp/samples.json --threshold 0.2
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parse_policy import Masters, PolicyParser  # noqa: E402
+from parsers import get_text_policy_parser, profiling  # noqa: E402
+from parsers.base import BasePolicyParser  # noqa: E402
+from parsers.reader import PdfReader  # noqa: E402
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(BENCHMARKS, "golden")
+SAMPLES = os.path.join(BENCHMARKS, "..", "pdf", "*")
+
+# Golden rows are built with a fixed processing date, it ends up in every row
+PROCESSING_DATE = "01/15/2024"
+
+# Amounts (1,180.00) and runs of digits too long to be part of a date (policy, mobile, engine numbers)
+PERTURBED_NUMBERS = re.compile(r"\d{1,3}(?:,\d{2,3})+\.\d{2}|\d+\.\d{2}|(?<![/\-\d])\d{5,}(?![/\-\d])")
+
+
+def perturb(text, rng):
+    """text with the digits of amounts and long numbers replaced at random, keeping their shape"""
+
+    def replace(match):
+        digits = [rng.choice("123456789")]
+        digits += [rng.choice("0123456789") if c.isdigit() else c for c in match.group()[1:]]
+        return "".join(digits)
+
+    return PERTURBED_NUMBERS.sub(replace, text)
+
+
+def time_extraction(file):
+    """Seconds each extractor takes over the whole document"""
+    timings = {}
+    start = time.perf_counter()
+    PdfReader(file).read_file_pypdf()
+    timings["read_file_pypdf"] = time.perf_counter() - start
+    start = time.perf_counter()
+    PdfReader(file).read_file_pdfminer()
+    timings["read_file_pdfminer"] = time.perf_counter() - start
+    return timings
+
+
+def profile_samples(parser, files, repeat):
+    """Fastest time of every profiled stage per sample, and the rows (or errors) of the samples"""
+    stages = defaultdict(dict)
+    records = {}
+    for _ in range(repeat):
+        for file in files:
+            name = os.path.basename(file)
+            row, error = parser.parse_file(file)
+            records[name] = {"row": dict(row)} if error is None else {"error": dict(error, file=name)}
+            _, timings = profiling.profiler.files[-1]
+            for stage, seconds in timings.items():
+                stages[name][stage] = min(seconds, stages[name].get(stage, seconds))
+    return stages, records
+
+
+def print_stages(stages, extraction):
+    columns = ["read_file_pypdf", "read_file_pdfminer", "extract.pypdf", "extract.pdfminer", "detect"]
+    columns += ["fields", "transform", "branch_code"]
+    print(f"{'sample':<18}" + "".join(f"{column:>19}" for column in columns))
+    for name in sorted(stages):
+        timings = dict(stages[name], **extraction[name])
+        # Fields calling other fields (get_state calls get_reg_no) count their time twice
+        timings["fields"] = sum(seconds for stage, seconds in timings.items() if stage.startswith("field."))
+        print(f"{name:<18}" + "".join(f"{timings.get(column, 0) * 1000:>17.2f}ms" for column in columns))
+
+    fields = defaultdict(float)
+    for timings in stages.values():
+        for stage, seconds in timings.items():
+            if stage.startswith("field."):
+                fields[stage[len("field."):]] += seconds
+    print("\nSlowest fields over all samples:")
+    for field, seconds in sorted(fields.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {seconds * 1000:>8.2f}ms {field}")
+
+
+def check_golden(records, golden_path):
+    with open(golden_path) as golden_file:
+        golden = json.load(golden_file)
+
+    failures = 0
+    for name in sorted(set(golden) | set(records)):
+        expected, found = golden.get(name), records.get(name)
+        if expected == found:
+            continue
+        failures += 1
+        if expected is None or found is None:
+            print(f"{name}: {'not in golden output' if expected is None else 'missing'}")
+            continue
+        for kind in ("row", "error"):
+            expected_values, found_values = expected.get(kind) or {}, found.get(kind) or {}
+            for key in sorted(set(expected_values) | set(found_values)):
+                if expected_values.get(key) != found_values.get(key):
+                    print(f"{name}: {kind} {key} {expected_values.get(key)!r} != {found_values.get(key)!r}")
+    print(f"Golden output: {len(records) - failures}/{len(records)} samples identical")
+    return failures == 0
+
+
+def synthetic_corpus(contents, documents, seed):
+    rng = random.Random(seed)
+    return [perturb(contents[index % len(contents)], rng) for index in range(documents)]
+
+
+def parse_texts(parser, texts):
+    """Seconds to parse texts like --from-text does, and the number of them that didn't give a row"""
+    failed = 0
+    start = time.perf_counter()
+    for text in texts:
+        policy = get_text_policy_parser(text)
+        try:
+            if policy.__class__ is BasePolicyParser:
+                raise ValueError("Unable to identify Insurer")
+            parser.transform_to_saibaa(policy)
+        except Exception:
+            failed += 1
+    return time.perf_counter() - start, failed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("files", nargs="*", help="Sample PDFs, all of pdf/ by default")
+    arg_parser.add_argument("--branches", default=os.path.join(GOLDEN_DIR, "branches.csv"), help="Branch Master")
+    arg_parser.add_argument("--golden", default=os.path.join(GOLDEN_DIR, "samples.json"))
+    arg_parser.add_argument("--update-golden", action="store_true", help="Store the current rows as golden")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs over the samples and the corpus, the fastest counts")
+    arg_parser.add_argument("--documents", type=int, default=2000, help="Synthetic documents to parse")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--baseline", help="JSON file with the throughput to compare with")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Store this run's throughput in --baseline")
+    arg_parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Fraction of the baseline throughput that may be lost"
+    )
+    args = arg_parser.parse_args()
+
+    files = sorted(args.files or glob.glob(SAMPLES))
+    Masters.read_branch_master(args.branches)
+    parser = PolicyParser(date=PROCESSING_DATE, files=(), profile=True)
+
+    # Parsers report unreadable files and dates, not of interest here
+    with redirect_stdout(StringIO()):
+        extraction = {}
+        for file in files:
+            try:
+                extraction[os.path.basename(file)] = time_extraction(file)
+            except Exception:
+                extraction[os.path.basename(file)] = {}
+        stages, records = profile_samples(parser, files, args.repeat)
+    print_stages(stages, extraction)
+    print()
+
+    passed = True
+    if args.update_golden:
+        os.makedirs(os.path.dirname(args.golden), exist_ok=True)
+        with open(args.golden, "w") as golden_file:
+            json.dump(records, golden_file, indent=2, sort_keys=True)
+            golden_file.write("\n")
+        print(f"Golden output of {len(records)} samples written to {args.golden}")
+    else:
+        passed = check_golden(records, args.golden)
+
+    # Synthetic documents are parsed from text, without the profiler
+    profiling.disable()
+    contents = []
+    with redirect_stdout(StringIO()):
+        for file in files:
+            try:
+                policy = parser.read_policy(file)
+            except Exception:
+                continue
+            if policy.__class__ is not BasePolicyParser:
+                contents.append(policy.content)
+    if not contents:
+        print("No sample could be parsed, nothing to scale")
+        return 1
+
+    texts = synthetic_corpus(contents, args.documents, args.seed)
+    with redirect_stdout(StringIO()):
+        runs = [parse_texts(parser, texts) for _ in range(args.repeat)]
+    elapsed, failed = min(runs)
+    throughput = len(texts) / elapsed
+    size = sum(map(len, texts)) / 1024 / 1024
+    print(f"\n{len(texts)} synthetic documents, {size:.1f}MB of text: {elapsed:.2f}s, {throughput:.0f} documents/s")
+    if failed:
+        print(f"{failed} synthetic documents didn't give a row")
+        passed = False
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"documents_per_second": throughput}, baseline_file)
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["documents_per_second"]
+        change = throughput / baseline - 1
+        print(f"Baseline {baseline:.0f} documents/s, {change:+.1%}")
+        if change < -args.threshold:
+            print(f"Throughput dropped by more than {args.threshold:.0%}")
+            passed = False
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/bin/env python3
+"""Cold start of parse_policy, from `python -X importtime`, with a target to stay under.
+
+Imports parse_policy in a fresh interpreter --repeat times and takes the fastest, so a busy machine
+doesn't fail the run. The dependencies only some runs need (the PDF extractors, fuzzy matching,
+dateparser, the insurer pattern tables, ...) must not be imported at all. The run fails when one of
+them is, or when the import takes longer than --target milliseconds.
+
+    python benchmarks/bench_startup.py --target 150
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Imported when first used, never when parse_policy is imported
+DEFERRED_MODULES = [
+    "PyPDF2",
+    "pdfminer",
+    "dateparser",
+    "thefuzz",
+    "rapidfuzz",
+    "openpyxl",
+    "regex",
+    "concurrent.futures.process",
+    "parsers.sbi",
+    "parsers.new_india",
+    "parsers.icici_lombard",
+]
+
+
+def import_times(module):
+    """Cumulative import time in microseconds of every module imported by importing module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--module", default="parse_policy")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--target", type=float, default=150, help="Milliseconds the import may take")
+    arg_parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = arg_parser.parse_args()
+
+    # The first run also writes the bytecode caches, it isn't counted
+    import_times(args.module)
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    fastest = min(runs, key=lambda times: times[args.module])
+    elapsed = fastest[args.module] / 1000
+
+    print(f"Slowest imports of {args.module}:")
+    for name, cumulative in sorted(fastest.items(), key=lambda item: -item[1])[1 : args.top + 1]:
+        print(f"  {cumulative / 1000:>7.1f}ms {name}")
+
+    failed = False
+    deferred = [
+        module for module in DEFERRED_MODULES if any(name == module or name.startswith(module + ".") for name in fastest)
+    ]
+    if deferred:
+        print(f"Imported at startup, should be deferred: {', '.join(deferred)}")
+        failed = True
+
+    print(f"import {args.module}: {elapsed:.1f}ms, best of {args.repeat} (target {args.target:.0f}ms)")
+    if elapsed > args.target:
+        print("Over target")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
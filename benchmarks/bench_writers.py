@@ -0,0 +1,116 @@
+#!/bin/env python3
+"""Output writing, rows/sec and peak RSS by row count.
+
+Writes SAIBA rows through each of the writers in writers/, xlsx being openpyxl in write-only mode,
+and through a regular openpyxl workbook, which keeps every cell in memory until it is saved. Each
+case runs in its own process so its peak RSS is its own.
+
+    python benchmarks/bench_writers.py --rows 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parse_policy import SAIBA_HEADERS  # noqa: E402
+from writers import WRITERS as FORMAT_WRITERS  # noqa: E402
+
+
+def saiba_row(i):
+    row = {header: "0" for header in SAIBA_HEADERS}
+    row.update(
+        {
+            "Sno": i + 1,
+            "CustName": "MR ANKIT BANGA",
+            "Address": "S/O SH OM PRAKASH BANGA R/O WARD NO 1, RAM NAGAR, TEHSIL HODAL, FARIDABAD, HARYANA 121106",
+            "PolicyNo": f"{1000000000 + i}",
+            "StartDate": "07/16/2022",
+            "ExpiryDate": "07/15/2023",
+            "file": f"policy_{i}.pdf",
+        }
+    )
+    return row
+
+
+class WorkbookDictWriter(object):
+    """The same interface over a regular openpyxl workbook"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook()
+        self.sheet = self.workbook.active
+        return self
+
+    def __exit__(self, *exc_info):
+        self.workbook.save(self.path)
+
+    def add_headers(self, headers):
+        self.headers = headers
+        self.sheet.append(headers)
+
+    def add_row(self, row):
+        self.sheet.append([row.get(header, "") for header in self.headers])
+
+
+OPENPYXL_WRITERS = {"workbook": WorkbookDictWriter}
+
+WRITERS = {**FORMAT_WRITERS, **OPENPYXL_WRITERS}
+
+
+def run_case(writer_name, rows):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with WRITERS[writer_name](os.path.join(directory, "output.xlsx")) as writer:
+            writer.add_headers(SAIBA_HEADERS)
+            for i in range(rows):
+                writer.add_row(saiba_row(i))
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"seconds": elapsed, "peak_rss_mb": rss / 1024, "growth_mb": (rss - rss_before) / 1024}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    arg_parser.add_argument(
+        "--openpyxl-max", type=int, default=10000, help="Largest row count to try the openpyxl workbook at"
+    )
+    arg_parser.add_argument("--case", nargs=2, metavar=("WRITER", "ROWS"), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]))))
+        return
+
+    print(f"{'writer':<12}{'rows':>8}{'rows/sec':>12}{'peak RSS':>12}{'growth':>10}")
+    for rows in args.rows:
+        for writer_name in WRITERS:
+            if writer_name in OPENPYXL_WRITERS and rows > args.openpyxl_max:
+                continue
+            output = subprocess.run(
+                [sys.executable, __file__, "--case", writer_name, str(rows)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{writer_name:<12}{rows:>8}{rows / result['seconds']:>12.0f}"
+                f"{result['peak_rss_mb']:>10.0f}MB{result['growth_mb']:>8.0f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/bin/env python3
+"""Time every compiled pattern of every policy parser on adversarial inputs.
+
+For each pattern the inputs are:
+  * the sample text, repeated to make a long multi-page document,
+  * the same text with the pattern's last required literal (usually its terminator) removed,
+  * the pattern's leading literal repeated over and over, with nothing that could end a match.
+
+Patterns are run on the regex module with a timeout when it is installed. Any pattern slower than
+--threshold on any input is reported, and the exit status is 1.
+
+    python benchmarks/lint_patterns.py --threshold 0.05
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import parsers  # noqa: E402, F401  (registers the insurer parsers)
+from parsers.classifier import insurer_classifier, required_literals  # noqa: E402
+from parsers.reader import PdfReader  # noqa: E402
+from parsers.regex_parser import budgeted_pattern, regex_module  # noqa: E402
+
+
+def parser_patterns():
+    for parser_class in insurer_classifier.parser_classes():
+        for name in dir(parser_class.RE):
+            if name.endswith("_PATTERNS"):
+                for index, pattern in enumerate(getattr(parser_class.RE, name)):
+                    yield f"{parser_class.__name__}.{name}[{index}]", pattern
+
+
+def read_corpus(files):
+    texts = []
+    for file in files:
+        try:
+            texts.append(PdfReader(file).read_file_pypdf())
+        except Exception as e:
+            print(f"Skipping {os.path.basename(file)}, {e}")
+    return "\n".join(texts)
+
+
+def adversarial_inputs(pattern, corpus, size):
+    long_document = (corpus * (size // max(len(corpus), 1) + 1))[:size]
+    yield "long document", long_document
+
+    literals = required_literals(pattern.pattern)
+    if literals:
+        terminator = re.compile(re.escape(literals[-1]), flags=re.I)
+        yield "no terminator", terminator.sub(" ", long_document)
+
+        label = literals[0]
+        yield "repeated label", ((label + " 1,234.56 Name Address\n") * (size // (len(label) + 23) + 1))[:size]
+
+
+def time_search(pattern, text, timeout):
+    start = time.perf_counter()
+    try:
+        if regex_module() is not None:
+            budgeted_pattern(pattern).search(text, timeout=timeout)
+        else:
+            pattern.search(text)
+    except TimeoutError:
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="PDF files for the corpus, defaults to the samples in pdf/")
+    parser.add_argument("--size", "-s", type=int, default=200_000, help="Characters in each input")
+    parser.add_argument("--threshold", "-t", type=float, default=0.05, help="Seconds a pattern may take")
+    parser.add_argument("--timeout", type=float, default=2, help="Seconds before a search is aborted")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest patterns to list")
+    args = parser.parse_args()
+
+    if regex_module() is None:
+        print("regex module not installed, slow patterns can't be aborted\n")
+
+    files = args.files or sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "pdf", "*")))
+    corpus = read_corpus(files)
+
+    results = []
+    for name, pattern in parser_patterns():
+        for input_name, text in adversarial_inputs(pattern, corpus, args.size):
+            elapsed = time_search(pattern, text, args.timeout)
+            results.append((float("inf") if elapsed is None else elapsed, name, input_name, pattern.pattern))
+
+    results.sort(reverse=True)
+    print(f"Slowest of {len(results)} searches over {args.size} characters:")
+    for elapsed, name, input_name, source in results[: args.top]:
+        timing = "timed out" if elapsed == float("inf") else f"{elapsed * 1000:.1f}ms"
+        print(f"  {timing:>10}  {name:<55} {input_name:<15} {source[:60]}")
+
+    slow = [result for result in results if result[0] > args.threshold]
+    if slow:
+        print(f"\n{len(slow)} search(es) over the {args.threshold}s threshold")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
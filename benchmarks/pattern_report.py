@@ -0,0 +1,101 @@
+#!/bin/env python3
+"""Hit rates of the policy parser patterns, from the stats file parse_policy.py --pattern-stats keeps.
+
+For every pattern list of every insurer the patterns are listed in their written order with their
+hits, misses, mean time per try and expected cost to hit, followed by the order --adaptive-patterns
+would try them in. Lists the adaptive mode leaves in the written order are marked as fixed.
+
+Dead patterns are listed at the end: those tried at least --min-tries times without ever giving a
+value, and those never tried at all (the patterns before them always hit, or their insurer hasn't
+been seen). Patterns that are never reached can still be the ones a rare layout needs, check before
+removing any.
+
+    python benchmarks/pattern_report.py pattern_stats.json
+    python benchmarks/pattern_report.py pattern_stats.json --insurer Sbi --dead-only
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parsers import insurer_classifier  # noqa: E402
+from parsers.pattern_stats import MIN_TRIES, PatternOrder, PatternStats, cost_to_hit  # noqa: E402
+from parsers.regex_parser import RegexPolicyParser, pattern_list_names  # noqa: E402
+
+
+def pattern_lists(parser_class):
+    """``(name, patterns)`` of every non-empty pattern list of parser_class, by name"""
+    names = pattern_list_names(parser_class.RE)
+    return sorted(
+        (name, getattr(parser_class.RE, name)) for name in set(names.values()) if getattr(parser_class.RE, name)
+    )
+
+
+def format_cost(cost):
+    if cost is None:
+        return "-"
+    if cost == float("inf"):
+        return "never"
+    return f"{cost * 1000:.3f}ms"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("stats", help="Stats file written by parse_policy.py --pattern-stats")
+    arg_parser.add_argument("--insurer", help="Only parser classes whose name contains this")
+    arg_parser.add_argument(
+        "--min-tries", type=int, default=MIN_TRIES, help="Tries before a pattern's hit rate counts"
+    )
+    arg_parser.add_argument("--dead-only", action="store_true", help="Only list the dead patterns")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.stats):
+        print(f"{args.stats} doesn't exist, record some runs with parse_policy.py --pattern-stats first")
+        return 1
+    stats = PatternStats.load(args.stats)
+    order = PatternOrder(stats, args.min_tries)
+
+    dead, unreached = [], []
+    for parser_class in insurer_classifier.parser_classes():
+        if not issubclass(parser_class, RegexPolicyParser):
+            continue
+        parser = parser_class.__name__
+        if args.insurer and args.insurer.lower() not in parser.lower():
+            continue
+        if not args.dead_only:
+            print(f"{parser}")
+
+        for name, patterns in pattern_lists(parser_class):
+            fixed = not parser_class.REORDER_PATTERNS or name in parser_class.FIXED_ORDER_PATTERNS
+            if not args.dead_only:
+                print(f"  {name}{' (fixed order)' if fixed else ''}")
+            for index, pattern in enumerate(patterns):
+                hits, misses, seconds = stats.get(parser, name, pattern)
+                tries = hits + misses
+                if tries >= args.min_tries and not hits:
+                    dead.append((parser, name, index, pattern, tries))
+                elif not tries:
+                    unreached.append((parser, name, index, pattern, tries))
+                if args.dead_only:
+                    continue
+                rate = f"{hits / tries:.0%}" if tries else "-"
+                mean = f"{seconds / tries * 1000:.3f}ms" if tries else "-"
+                cost = format_cost(cost_to_hit(hits, misses, seconds, args.min_tries))
+                print(f"    [{index}] {hits:>7} hits {misses:>7} misses {rate:>5} {mean:>10}/try {cost:>10}/hit")
+            if not args.dead_only and not fixed:
+                indexes = order.indexes(parser, name, patterns)
+                if list(indexes) != list(range(len(patterns))):
+                    print(f"    adaptive order: {', '.join(map(str, indexes))}")
+
+    print(f"\nNever gave a value in {args.min_tries} or more tries:")
+    for parser, name, index, pattern, tries in dead:
+        print(f"  {parser}.{name}[{index}] ({tries} tries) {pattern.pattern}")
+    print("\nNever tried:")
+    for parser, name, index, pattern, _ in unreached:
+        print(f"  {parser}.{name}[{index}] {pattern.pattern}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+# thefuzz and rapidfuzz are imported when the first index is built, runs that never look up a branch
+# don't pay for them
+
+# Lookups remembered per index, least recently used first out. Batches repeat the same few branches
+MAX_CACHED_MATCHES = 4096
+
+
+def choice_key(address):
+    """Branch address as thefuzz's token_sort_ratio sees it, processed and with sorted tokens"""
+    from thefuzz import utils
+
+    return " ".join(sorted(utils.full_process(address, force_ascii=True).split()))
+
+
+def query_key(branch):
+    """Same as choice_key, for the branch being looked up
+
+    extractOne runs the default processor over the query before the scorer's own processor.
+    """
+    from thefuzz import utils
+
+    return choice_key(utils.full_process(branch))
+
+
+class BranchIndex:
+    """Best match of a branch among the addresses of one insurer's branch master
+
+    Gives the same match as
+        process.extractOne(branch, addresses, scorer=fuzz.token_sort_ratio)
+    without processing every address on every lookup. Addresses are processed once, and a
+    lookup first scores the addresses sharing a token with the branch. The rest are only
+    scored when their length allows them to beat the best score found that way, so the
+    result, including the first address winning a tie, is unchanged.
+    """
+
+    def __init__(self, addresses):
+        self.addresses = list(addresses)
+        self.keys = [choice_key(address) for address in self.addresses]
+
+        self._postings = {}
+        for i, key in enumerate(self.keys):
+            for token in set(key.split()):
+                self._postings.setdefault(token, []).append(i)
+
+        self._by_length = sorted(range(len(self.keys)), key=lambda i: len(self.keys[i]))
+        self._lengths = [len(self.keys[i]) for i in self._by_length]
+        # Bounded, a long running service sees an open ended set of branch strings
+        self._cached_match = lru_cache(maxsize=MAX_CACHED_MATCHES)(self._match_branch)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def match(self, branch):
+        """(address, score) of the best match, None when there are no addresses"""
+        return self._cached_match(branch)
+
+    def _match_branch(self, branch):
+        found = self._match(query_key(branch))
+        if found is None:
+            return None
+        index, score = found
+        return self.addresses[index], int(round(score))
+
+    def _best(self, query, indexes, score_cutoff=0):
+        """(index, score) of the first best scoring of indexes, which are in ascending order"""
+        from rapidfuzz import fuzz as rfuzz
+        from rapidfuzz import process as rprocess
+
+        found = rprocess.extractOne(
+            query,
+            [self.keys[i] for i in indexes],
+            scorer=rfuzz.ratio,
+            processor=None,
+            score_cutoff=score_cutoff,
+        )
+        if found is None:
+            return None
+        _, score, position = found
+        return indexes[position], score
+
+    def _length_range(self, length, score):
+        """Lengths of keys that can score at least score against a query of length
+
+        The indel ratio can't exceed 200 * min(a, b) / (a + b), the range is widened by one
+        on both ends so that rounding never drops a candidate.
+        """
+        if score <= 0:
+            return 0, float("inf")
+        low = score * length / (200 - score) - 1
+        high = length * (200 - score) / score + 1
+        return low, high
+
+    def _match(self, query):
+        if not self.keys:
+            return None
+
+        shortlist = sorted({i for token in set(query.split()) for i in self._postings.get(token, ())})
+        best = self._best(query, shortlist) if shortlist else None
+        best_score = best[1] if best else 0
+
+        low, high = self._length_range(len(query), best_score)
+        shortlisted = set(shortlist)
+        rest = sorted(
+            i
+            for i in self._by_length[bisect_left(self._lengths, low) : bisect_right(self._lengths, high)]
+            if i not in shortlisted
+        )
+        other = self._best(query, rest, best_score) if rest else None
+
+        if best is None:
+            return other
+        if other is not None and (other[1] > best[1] or (other[1] == best[1] and other[0] < best[0])):
+            return other
+        return best
@@ -0,0 +1,86 @@
+import re
+from datetime import datetime
+
+APPLICABLE_DATE_FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "%d-%b-%Y", "%b %d, %Y", "%d %b, %Y"]
+
+# Shapes dateparser used to work out beyond the formats it was given, tried after them.
+# Day first throughout, month first only when the day can't be a month.
+EXTRA_DATE_FORMATS = [
+    "%B %d, %Y",
+    "%d %B, %Y",
+    "%d-%B-%Y",
+    "%b %d %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%B, %d %Y",
+    "%b, %d %Y",
+    "%d/%m/%y",
+    "%d-%m-%y",
+    "%d.%m.%Y",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+]
+
+SEPARATORS = " /-,."
+
+_COMMA = re.compile(r"\s*,\s*")
+_SEPT = re.compile(r"\bSEPT\b", flags=re.I)
+
+
+def normalize_text(text):
+    """Trim the separators regexes capture around a date and space commas the way the formats do"""
+    text = _COMMA.sub(", ", text.strip(SEPARATORS))
+    return _SEPT.sub("SEP", text)
+
+
+class DateNormalizer:
+    """Parses captured dates with a fixed list of strptime formats and writes them in one format
+
+    Results are memoized on the raw string, so a date repeated across fields or rows is parsed
+    once. With fallback set, strings none of the formats match are handed to dateparser.
+    """
+
+    def __init__(self, formats, output_format="%m/%d/%Y", fallback=False):
+        self.formats = list(formats)
+        self.output_format = output_format
+        self.fallback = fallback
+        self._formats = self.formats + [f for f in EXTRA_DATE_FORMATS if f not in self.formats]
+        self._dates = {}
+
+    def parse(self, text):
+        for date_format in self._formats:
+            try:
+                return datetime.strptime(text, date_format)
+            except ValueError:
+                pass
+
+        normalized = normalize_text(text)
+        if normalized != text:
+            for date_format in self._formats:
+                try:
+                    return datetime.strptime(normalized, date_format)
+                except ValueError:
+                    pass
+
+        if self.fallback:
+            from dateparser import parse as dt_parse
+
+            parsed = dt_parse(text, date_formats=self.formats)
+            if parsed is not None:
+                return parsed
+
+        return None
+
+    def format(self, text):
+        """text written in output_format, raises ValueError when it isn't a date"""
+        try:
+            formatted = self._dates[text]
+        except KeyError:
+            parsed = self.parse(text)
+            formatted = self._dates[text] = parsed.strftime(self.output_format) if parsed else None
+
+        if formatted is None:
+            raise ValueError(f"{text!r} does not match any known date format")
+        return formatted
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Seconds a writer waits on another process holding the database before giving up
+BUSY_TIMEOUT = 60
+
+
+def journal_path(output_file):
+    return f"{output_file}.journal"
+
+
+def connect(path, schema):
+    """Connection to the SQLite database at path, in WAL mode, with schema created"""
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(schema)
+    return connection
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as input_file:
+        for block in iter(lambda: input_file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Journal(object):
+    """SQLite record of the files a run has parsed, so an interrupted run can be resumed.
+
+    Every parsed file is stored with its size, modification time, content hash and the row or
+    error it produced. Workers record their own files, so the database is opened in WAL mode with a
+    busy timeout and every record is its own transaction. Connections are per process and opened on
+    first use, the journal can be pickled to worker processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {"path": self.path, "_connection": None, "_pid": None}
+
+    @property
+    def connection(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = connect(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " record TEXT NOT NULL,"
+                " updated REAL NOT NULL)",
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def record(self, file, row, error, digest=None):
+        """Store the outcome of parsing file, exactly one of row and error is set.
+
+        digest is the SHA-256 of the file's content, the file is hashed when it isn't given.
+        """
+        if not isinstance(file, (str, os.PathLike)):
+            # PDFs held in memory have nothing to resume from
+            return
+        path = os.path.abspath(file)
+        try:
+            stat = os.stat(path)
+            if digest is None:
+                digest = file_digest(path)
+        except OSError:
+            # Nothing to resume from for a file that can't be read
+            return
+
+        status, record = ("success", row) if error is None else ("error", error)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest, status, json.dumps(dict(record)), time.time()),
+        )
+
+    def lookup(self, file):
+        """The stored ``(row, error)`` of file, None if it wasn't parsed or has changed since."""
+        if not isinstance(file, (str, os.PathLike)):
+            return None
+        path = os.path.abspath(file)
+        entry = self.connection.execute(
+            "SELECT size, mtime_ns, digest, status, record FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if entry is None:
+            return None
+
+        size, mtime_ns, digest, status, record = entry
+        try:
+            stat = os.stat(path)
+            # Only hash the file again when it looks different
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                if file_digest(path) != digest:
+                    return None
+                # Touched but unchanged, don't hash it again next time
+                self.connection.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, path)
+                )
+        except OSError:
+            return None
+
+        record = json.loads(record)
+        return (record, None) if status == "success" else (None, record)
+
+    def digest(self, file):
+        """The content digest recorded for file, None if it isn't in the journal"""
+        if not isinstance(file, (str, os.PathLike)):
+            return None
+        entry = self.connection.execute("SELECT digest FROM files WHERE path = ?", (os.path.abspath(file),)).fetchone()
+        return entry[0] if entry is not None else None
+
+    def clear(self):
+        self.connection.execute("DELETE FROM files")
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+
+class PolicyIndex(object):
+    """SQLite index of the file each policy was first parsed from, by policy number and insurer.
+
+    Kept across runs, so a policy arriving again in a later batch, re-sent or re-issued as a
+    different file, is recognised. Files are told apart by their source, the hash of their content,
+    so the same file moved or renamed isn't taken for another. Only the process writing the output
+    uses it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = connect(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS policies ("
+                " policy_number TEXT NOT NULL,"
+                " insurer TEXT NOT NULL,"
+                " source TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " updated REAL NOT NULL,"
+                " PRIMARY KEY (policy_number, insurer))",
+            )
+        return self._connection
+
+    def claim(self, policy_number, insurer, source, name):
+        """Record the policy as parsed from source, a file called name.
+
+        Returns the name of the file it was parsed from first, if that was another source.
+        """
+        entry = self.connection.execute(
+            "SELECT source, name FROM policies WHERE policy_number = ? AND insurer = ?", (policy_number, insurer)
+        ).fetchone()
+        if entry is not None and entry[0] != source:
+            return entry[1]
+        self.connection.execute(
+            "INSERT OR REPLACE INTO policies VALUES (?, ?, ?, ?, ?)",
+            (policy_number, insurer, source, name, time.time()),
+        )
+        return None
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
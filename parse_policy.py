@@ -1,18 +1,29 @@
 #!/bin/env python3
 import argparse
+import copy
 import csv
-import glob
+import logging
 import os
+import signal
 import sys
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
-from dateparser import parse as dt_parse
-from thefuzz import fuzz, process
-from writers.excel import ExcelDictWriter
+from branches import BranchIndex
+from dates import APPLICABLE_DATE_FORMATS, DateNormalizer
+from journal import Journal, PolicyIndex, file_digest, journal_path
+from rows import Row
+from writers import WRITERS, get_writer
 
-from parsers import get_policy_parser
+from parsers import get_policy_parser, get_text_policy_parser, pattern_stats, profiling
 from parsers.base import BasePolicyParser, Insurers
+from parsers.cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE, ExtractionCache
+
+logger = logging.getLogger(__name__)
 
 SAIBA_INSURERS = {
     Insurers.SBI: "SBI General Insurance Company Limited",
@@ -142,15 +153,65 @@ SAIBA_HEADERS = [
     "file",
 ]
 
+# Columns that are the same for every policy
+SAIBA_DEFAULTS = {
+    # "Mode": self.clean_text(input.get_payment_mode()) or "Cash",
+    "Mode": "Cash",
+    "Country": "India",
+    "BrokerBranchCode": "0",
+    "BrokerBranch": "Head Office",
+    "CustGroupSAIBA": "Other",
+    "RMCodeSAIBA": "",  # To be entered manually
+    "SolicitCode": "14",
+    "CSCCodeSAIBA": "",  # User upload id, To be entered manually
+    "TCCodeSAIBA": "0",
+    "Ref/POS/MISPCodeSAIBA": "0",
+    "VehicleRegnStatus": "N",
+    "CoverNoteNo": "0",
+    "PolRecvdFormat": "Recd. in Soft Copy",
+    "BrokerBizType": "New",
+    "InsurerBizType": "New",
+    "OwnerDriver(LPD)": "0",
+    "RoadsideAssistance(WithoutBrokerage)": "0",
+    "StampDuty": "0",
+    "TranNo": "0",
+    "CessRate": "0",
+    "BrokRate": "",  # To be entered manually
+    "TPBrokRate": "0",
+    "OwnerDriver%": "0",
+    "RewardRate": "0",
+    "RewardTPRate": "0",
+    "RewardRateOn": "PREMIUM",  # To be entered manually
+    "ExpRate": "0",
+    "TPExpRate": "0",
+    "RefRate": "0",
+    "RefTPRate": "0",
+    "POS/MISPRate": "0",
+    "TPPOS/MISPRate": "0",
+    "PayAt": "",  # To be entered manually
+    "CSCRate": "0",
+    "PolicyStatus": "LoggedIn",
+    "Remarks": "Fresh",
+    "CampaignName": "No Campaign",
+}
+
+
+class SaibaRow(Row):
+    HEADERS = SAIBA_HEADERS
+    DEFAULTS = SAIBA_DEFAULTS
+
+
 ENABLED_INSURERS = [Insurers.SBI, Insurers.NEW_INDIA, Insurers.ICICI_LOMBARD, Insurers.HDFC_ERGO]
 
 # ENABLED_INSURERS = [Insurers.DIGIT]
 
-APPLICABLE_DATE_FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "%d-%b-%Y", "%b %d, %Y", "%d %b, %Y"]
+# Appended to the file name of a PDF for its text, see --gentxt and --from-text
+TEXT_SUFFIX = ".txt"
 
 
 class Masters:
     _branch_master = {}
+    _branch_indexes = {}
 
     @classmethod
     def read_branch_master(cls, master_file):
@@ -158,19 +219,32 @@ class Masters:
             for row in csv.DictReader(csvfile):
                 insurer_branches = cls._branch_master.setdefault(row["Insurer"].lower(), {})
                 insurer_branches[row["Address"]] = row["BranchAutoCode"]
+        cls._branch_indexes = {}
         return cls._branch_master
 
+    @classmethod
+    def branch_index(cls, insurer):
+        insurer = insurer.lower()
+        index = cls._branch_indexes.get(insurer)
+        if index is None:
+            index = cls._branch_indexes[insurer] = BranchIndex(cls._branch_master[insurer].keys())
+        return index
+
     @classmethod
     def get_branch_code(cls, insurer, branch):
+        if profiling.profiler is not None:
+            return profiling.profiler.time("branch_code", cls._get_branch_code, insurer, branch)
+        return cls._get_branch_code(insurer, branch)
+
+    @classmethod
+    def _get_branch_code(cls, insurer, branch):
         if not branch:
             return ""
 
         branches = cls._branch_master[insurer.lower()]
 
         # Find branch using fuzzy match
-        found_branch, score = process.extractOne(
-            branch, branches.keys(), scorer=fuzz.token_sort_ratio
-        )
+        found_branch, score = cls.branch_index(insurer).match(branch)
 
         # print(f"{score}, {branch}, {found_branch}")
 
@@ -182,10 +256,96 @@ class Masters:
 
 
 class PolicyParser(object):
-    def __init__(self, date, files, txt_file_directory=None) -> None:
+    def __init__(
+        self,
+        date,
+        files,
+        txt_file_directory=None,
+        workers=1,
+        timeout=None,
+        chunk_size=8,
+        cache=None,
+        pattern_budget=None,
+        profile=False,
+        date_fallback=False,
+        journal=None,
+        resume=False,
+        from_text=False,
+        incremental=False,
+        policy_index=None,
+        pattern_stats_path=None,
+        adaptive_patterns=False,
+    ) -> None:
         self.processing_date = date
         self.input_files = files
         self.txt_file_directory = txt_file_directory
+        # Number of processes to spread files over, 1 parses everything in this process
+        self.workers = workers
+        # Per-file timeout in seconds
+        self.timeout = timeout
+        # Number of files handed to a worker process at a time
+        self.chunk_size = chunk_size
+        # ExtractionCache for the text extracted from PDFs, if any
+        self.cache = cache
+        # Seconds a single regex may spend on a policy before it is aborted
+        self.pattern_budget = pattern_budget
+        # Record time spent per stage, see parsers.profiling
+        self.profile = profile
+        # Dates no format matches are left to dateparser when date_fallback is set
+        self.dates = DateNormalizer(APPLICABLE_DATE_FORMATS, fallback=date_fallback)
+        # Journal every parsed file is recorded in, and whether to skip the files it already has.
+        # Resuming writes the recorded rows of skipped files again, incremental runs leave them out.
+        self.journal = journal
+        self.resume = resume
+        self.incremental = incremental
+        # Files skipped because the journal has them unchanged
+        self.skipped = 0
+        # PolicyIndex of the policies parsed in earlier runs, rows of policies it has from another
+        # file are reported as duplicates
+        self.policy_index = policy_index
+        # Input files are text saved with --gentxt, parsed without reading the PDFs again
+        self.from_text = from_text
+        # File the hit rates of the patterns are recorded in across runs, see parsers.pattern_stats,
+        # and whether to try patterns in the order the recorded hit rates suggest
+        self.pattern_stats_path = pattern_stats_path
+        self.adaptive_patterns = adaptive_patterns
+        self.configure_parsers()
+        self.set_processing_date(date)
+
+    def set_processing_date(self, date):
+        self.processing_date = date
+        # Same for every row
+        self.formatted_processing_date = self.format_date(self.processing_date)
+
+    def configure_parsers(self):
+        """Apply the settings of this run to the policy parsers, called again in every worker."""
+        # Workers start with a fresh profiler, not a copy of the parent's
+        if self.profile:
+            profiling.enable()
+        else:
+            profiling.disable()
+        if self.pattern_stats_path:
+            pattern_stats.enable()
+        else:
+            pattern_stats.disable()
+        # Ordered by the recorded runs only, not by what this run has seen so far
+        if self.pattern_stats_path and self.adaptive_patterns:
+            recorded = pattern_stats.PatternStats.load(self.pattern_stats_path)
+            pattern_stats.set_order(pattern_stats.PatternOrder(recorded))
+        else:
+            pattern_stats.set_order(None)
+
+    def save_pattern_stats(self):
+        """Add the pattern hit rates of this run to the stats file.
+
+        The file is loaded, merged with this run and replaced, so it has a single writer: of runs
+        sharing a stats file at the same time, only the counts of the last to finish are kept.
+        """
+        if not self.pattern_stats_path or pattern_stats.stats is None:
+            return
+        recorded = pattern_stats.PatternStats.load(self.pattern_stats_path)
+        recorded.merge(pattern_stats.stats.drain())
+        recorded.save(self.pattern_stats_path)
 
     def clean_text(self, text):
         if not text:
@@ -195,14 +355,17 @@ class PolicyParser(object):
         return f"{cleaned_text}"
 
     def format_date(self, datetime_str):
+        if profiling.profiler is not None:
+            return profiling.profiler.time("format_date", self._format_date, datetime_str)
+        return self._format_date(datetime_str)
+
+    def _format_date(self, datetime_str):
         cleaned_datetime_str = self.clean_text(datetime_str)
         if not cleaned_datetime_str:
             return cleaned_datetime_str
 
         try:
-            return dt_parse(cleaned_datetime_str, date_formats=APPLICABLE_DATE_FORMATS).strftime(
-                "%m/%d/%Y"
-            )
+            return self.dates.format(cleaned_datetime_str)
         except Exception as e:
             print(f"Unable to parse date {cleaned_datetime_str}. {e}")
             return cleaned_datetime_str
@@ -215,160 +378,516 @@ class PolicyParser(object):
         return cleaned_mobile_str
 
     def transform_to_saibaa(self, input: BasePolicyParser):
-        return {
-            # Extracted Values
-            "CustName": self.clean_text(input.get_customer_name()).replace(".", " ").strip(),
-            "Address": self.clean_text(input.get_address()),
-            "MobileNo": self.format_mobile_no(input.get_mobile_no()),
-            "City": self.clean_text(input.get_city()),
-            "State": self.clean_text(input.get_state()),
-            "Ref/POS/MISP": "POS" if input.get_posp_identifier() else "Ref",
-            "InsurerSAIBA": SAIBA_INSURERS[input.get_insurer()],
-            "PolicyTypeSAIBA": input.get_policy_type(),
-            "VehicleNo": input.get_reg_no(),
-            "Make": self.clean_text(input.get_make()),
-            "Model": self.clean_text(input.get_model()),
-            "Variant": self.clean_text(input.get_variant()),
-            "YearofMan": self.clean_text(input.get_year_of_manufacture()),
-            "NCB": self.clean_text(input.get_ncb()) or "0",
-            "ODD": input.get_od_premium() or "0",
-            "StartDate": self.format_date(input.get_start_date()),
-            "ExpiryDate": self.format_date(input.get_end_date()),
-            "PolicyNo": self.clean_text(input.get_policy_number()),
-            "PolicyIssueDate": self.format_date(
-                input.get_policy_issue_date() or input.get_receipt_date()
-            ),
-            "SumInsured": input.get_sum_insured() or "0",
-            "ODNetPremium": input.get_od_premium() or "0",
-            "Tp/Terroisem Prem": input.get_tp_premium() or "0",
-            "GST/TaxAmount": input.get_taxes() or "0",
-            "GrossPrem": input.get_total_premium(),
-            "TranAmt": self.clean_text(input.get_net_premium()),
-            "TranDated": self.format_date(
-                input.get_receipt_date() or input.get_policy_issue_date()
-            ),
-            "GST/TaxRate": self.clean_text(input.get_tax_rate()),
-            "ReceiptNo": self.clean_text(input.get_receipt_number()),
-            "PremiumReceiptNo": self.clean_text(input.get_receipt_number()),
-            "PremiumReceiptDate": self.format_date(
-                input.get_receipt_date() or input.get_policy_issue_date()
-            ),
-            "InsurerBranchAutoCodeSAIBA": Masters.get_branch_code(
-                SAIBA_INSURERS[input.get_insurer()], input.get_insurer_branch()
-            ),
-            "VerticalType": "Corporate" if input.get_customer_type() == "corporate" else "Retail",
-            "BusinessType": "Business" if input.get_customer_type() == "corporate" else "Service",
-            "OrgType": input.get_customer_type(),
-            "PolicyReceiveDate": self.format_date(self.processing_date),
-            "BusPropDate": self.format_date(self.processing_date),
-            # Default Values
-            # "Mode": self.clean_text(input.get_payment_mode()) or "Cash",
-            "Mode": "Cash",
-            "Country": "India",
-            "BrokerBranchCode": "0",
-            "BrokerBranch": "Head Office",
-            "CustGroupSAIBA": "Other",
-            "RMCodeSAIBA": "",  # To be entered manually
-            "SolicitCode": "14",
-            "CSCCodeSAIBA": "",  # User upload id, To be entered manually
-            "TCCodeSAIBA": "0",
-            "Ref/POS/MISPCodeSAIBA": "0",
-            "VehicleRegnStatus": "N",
-            "CoverNoteNo": "0",
-            "PolRecvdFormat": "Recd. in Soft Copy",
-            "BrokerBizType": "New",
-            "InsurerBizType": "New",
-            "OwnerDriver(LPD)": "0",
-            "RoadsideAssistance(WithoutBrokerage)": "0",
-            "StampDuty": "0",
-            "TranNo": "0",
-            "CessRate": "0",
-            "BrokRate": "",  # To be entered manually
-            "TPBrokRate": "0",
-            "OwnerDriver%": "0",
-            "RewardRate": "0",
-            "RewardTPRate": "0",
-            "RewardRateOn": "PREMIUM",  # To be entered manually
-            "ExpRate": "0",
-            "TPExpRate": "0",
-            "RefRate": "0",
-            "RefTPRate": "0",
-            "POS/MISPRate": "0",
-            "TPPOS/MISPRate": "0",
-            "PayAt": "",  # To be entered manually
-            "CSCRate": "0",
-            "PolicyStatus": "LoggedIn",
-            "Remarks": "Fresh",
-            "CampaignName": "No Campaign",
-        }
+        return SaibaRow.from_dict(
+            {
+                "CustName": self.clean_text(input.get_customer_name()).replace(".", " ").strip(),
+                "Address": self.clean_text(input.get_address()),
+                "MobileNo": self.format_mobile_no(input.get_mobile_no()),
+                "City": self.clean_text(input.get_city()),
+                "State": self.clean_text(input.get_state()),
+                "Ref/POS/MISP": "POS" if input.get_posp_identifier() else "Ref",
+                "InsurerSAIBA": SAIBA_INSURERS[input.get_insurer()],
+                "PolicyTypeSAIBA": input.get_policy_type(),
+                "VehicleNo": input.get_reg_no(),
+                "Make": self.clean_text(input.get_make()),
+                "Model": self.clean_text(input.get_model()),
+                "Variant": self.clean_text(input.get_variant()),
+                "YearofMan": self.clean_text(input.get_year_of_manufacture()),
+                "NCB": self.clean_text(input.get_ncb()) or "0",
+                "ODD": input.get_od_premium() or "0",
+                "StartDate": self.format_date(input.get_start_date()),
+                "ExpiryDate": self.format_date(input.get_end_date()),
+                "PolicyNo": self.clean_text(input.get_policy_number()),
+                "PolicyIssueDate": self.format_date(
+                    input.get_policy_issue_date() or input.get_receipt_date()
+                ),
+                "SumInsured": input.get_sum_insured() or "0",
+                "ODNetPremium": input.get_od_premium() or "0",
+                "Tp/Terroisem Prem": input.get_tp_premium() or "0",
+                "GST/TaxAmount": input.get_taxes() or "0",
+                "GrossPrem": input.get_total_premium(),
+                "TranAmt": self.clean_text(input.get_net_premium()),
+                "TranDated": self.format_date(
+                    input.get_receipt_date() or input.get_policy_issue_date()
+                ),
+                "GST/TaxRate": self.clean_text(input.get_tax_rate()),
+                "ReceiptNo": self.clean_text(input.get_receipt_number()),
+                "PremiumReceiptNo": self.clean_text(input.get_receipt_number()),
+                "PremiumReceiptDate": self.format_date(
+                    input.get_receipt_date() or input.get_policy_issue_date()
+                ),
+                "InsurerBranchAutoCodeSAIBA": Masters.get_branch_code(
+                    SAIBA_INSURERS[input.get_insurer()], input.get_insurer_branch()
+                ),
+                "VerticalType": "Corporate" if input.get_customer_type() == "corporate" else "Retail",
+                "BusinessType": "Business" if input.get_customer_type() == "corporate" else "Service",
+                "OrgType": input.get_customer_type(),
+                "PolicyReceiveDate": self.formatted_processing_date,
+                "BusPropDate": self.formatted_processing_date,
+            }
+        )
 
     def write_txt_file(self, filename, policy):
         # Write txt files for PDF, if requested (for debugging)
         if self.txt_file_directory:
             os.makedirs(self.txt_file_directory, exist_ok=True)
 
-            with open(f"{self.txt_file_directory}/{filename}.txt", "w") as txt_file:
+            # Written as is, so --from-text parses exactly the text the PDF was parsed from
+            with open(f"{self.txt_file_directory}/{filename}{TEXT_SUFFIX}", "w", newline="") as txt_file:
                 txt_file.write(policy.content)
 
-    def extract_data_from_pdf(self):
-        extracted_data = []
-        error_data = []
-        for input_file in self.input_files:
-            row = {}
+    def read_policy(self, file, digest=None):
+        """Policy parser of an input file, a PDF or, with from_text, its text saved by write_txt_file.
 
-            if isinstance(input_file, str):
-                file = input_file
-            else:
-                file = input_file.file
+        digest is the SHA-256 of the file's content when it is already known.
+        """
+        if not self.from_text:
+            return get_policy_parser(
+                file,
+                cache=self.cache,
+                enabled_insurers=ENABLED_INSURERS,
+                pattern_budget=self.pattern_budget,
+                digest=digest,
+            )
+
+        with open(file, newline="") as txt_file:
+            return get_text_policy_parser(txt_file.read(), pattern_budget=self.pattern_budget)
+
+    def parse_file(self, input_file, digest=None):
+        """Parse a single input file, digest is the SHA-256 of its content when it is already known.
+
+        Returns a ``(row, error)`` tuple, exactly one of which is set.
+        """
+        if profiling.profiler is None:
+            row, error = self._parse_file(input_file, digest)
+        else:
+            profiling.profiler.begin_file()
+            row, error = self._parse_file(input_file, digest)
+            profiling.profiler.end_file(row["InsurerSAIBA"] if row is not None else "Not parsed")
+
+        if self.journal is not None:
+            self.journal.record(input_path(input_file), row, error, digest)
+        return row, error
+
+    def _parse_file(self, input_file, digest):
+        row = {}
 
-            file_prefix = os.path.basename(file).strip()
+        file = input_path(input_file)
+        name = input_name(file)
+        file_prefix = os.path.basename(name).strip()
+        if self.from_text and file_prefix.endswith(TEXT_SUFFIX):
+            # Rows name the PDF the text was saved from
+            file_prefix = file_prefix[: -len(TEXT_SUFFIX)]
 
-            try:
-                # print(f"Parsing {file}")
-                policy = get_policy_parser(file)
+        try:
+            # print(f"Parsing {file}")
+            with file_timeout(self.timeout):
+                policy = self.read_policy(file, digest)
                 self.write_txt_file(file_prefix, policy)
 
                 if policy.__class__ == BasePolicyParser:
                     row["file"] = file_prefix
                     row["reason"] = "Unable to identify Insurer"
-                    error_data.append(row)
+                    return None, row
                 elif policy.get_insurer() not in ENABLED_INSURERS:
                     row["file"] = file_prefix
                     row["remarks"] = SAIBA_INSURERS[policy.get_insurer()]
                     row["reason"] = "Insurer Disabled"
-                    error_data.append(row)
+                    return None, row
                 else:
-                    row.update(self.transform_to_saibaa(policy))
+                    if profiling.profiler is None:
+                        saiba_row = self.transform_to_saibaa(policy)
+                    else:
+                        saiba_row = profiling.profiler.time("transform", self.transform_to_saibaa, policy)
+                    if getattr(policy, "pattern_timeouts", None):
+                        logger.warning(
+                            "'%s': %d pattern(s) exceeded the time budget.", name, len(policy.pattern_timeouts)
+                        )
                     # Add filename to excel for debugging purposes
-                    row["file"] = file_prefix
-                    extracted_data.append(row)
-            except Exception as e:
-                print(f"Unable to read file: '{file}'. {e}.")
-                row["file"] = file
-                row["reason"] = f"Unable to read PDF. {e}."
-                error_data.append(row)
-                continue
+                    saiba_row["file"] = file_prefix
+                    return saiba_row, None
+        except Exception as e:
+            print(f"Unable to read file: '{name}'. {e}.")
+            row["file"] = name
+            row["reason"] = f"Unable to read PDF. {e}."
+            return None, row
+
+    def parse_files(self, files=None, digests=None):
+        """Yield a ``(row, error)`` tuple per file, the input files by default, in input order.
+
+        With several workers, files on disk are parsed in worker processes and PDFs held in memory
+        in this process. digests maps paths to the SHA-256 of their content, for the files already
+        hashed, each is taken out as its file is parsed.
+        """
+        if files is None:
+            files = self.input_files
+        if digests is None:
+            digests = {}
+        if self.workers > 1:
+            return self._parse_files_parallel(files, digests)
+        return (self.parse_file(input_file, _known_digest(digests, input_file)) for input_file in files)
+
+    def extract_data_from_pdf(self):
+        """Yield a ``(row, error)`` record per input file as soon as it is parsed, in input order.
+
+        Exactly one of ``row`` (a SAIBA row) and ``error`` (a row for the error report) is set.
+        Files the journal has unchanged are skipped when resuming, their recorded records are yielded
+        in their place among the parsed ones. Incremental runs only skip the files parsed without an
+        error, files that failed are parsed again.
+        Copies of a file earlier in the batch aren't parsed and policies the policy index has from
+        another file aren't written as rows, both are reported as errors instead.
+        Input files can be any iterable, they are only read as parsing needs them.
+        """
+        skip_recorded = self.journal is not None and (self.resume or self.incremental)
+        # Every file with a record to yield, in input order, as ``[file, record, digest]`` lists whose
+        # record is None until the file is parsed
+        pending = deque()
+        # The entries of the files being parsed, parse_files yields their records in the same order
+        parsing = deque()
+        # Names of the files seen so far by content digest, and the digests of the files to parse
+        names = {}
+        digests = {}
+
+        def remaining():
+            for input_file in self.input_files:
+                file = input_path(input_file)
+                if skip_recorded:
+                    record = self.journal.lookup(file)
+                    # Incremental runs try failed files again, a duplicate's original may be gone or
+                    # a parser fixed since. Resuming writes out the errors as recorded.
+                    if record is not None and (self.resume or record[1] is None):
+                        self.skipped += 1
+                        # Still the original of any copy of it that follows
+                        names.setdefault(self.journal.digest(file), input_name(file))
+                        if self.resume:
+                            pending.append([file, record, None])
+                        continue
+
+                # Hashed before anything is extracted, copies aren't parsed at all. The digest is
+                # handed on to parsing, the journal and the extraction cache, files are hashed once.
+                digest = _file_digest(file)
+                error = self._duplicate_file(file, digest, names)
+                if error is not None:
+                    pending.append([file, (None, error), digest])
+                    continue
+                if digest is not None:
+                    digests[file] = digest
+                entry = [file, None, digest]
+                pending.append(entry)
+                parsing.append(entry)
+                yield input_file
+
+        for record in self.parse_files(remaining(), digests):
+            parsing.popleft()[1] = record
+            while pending and pending[0][1] is not None:
+                yield self._check_duplicate_policy(*pending.popleft())
+        for file, record, digest in pending:
+            yield self._check_duplicate_policy(file, record, digest)
+
+    def _duplicate_file(self, file, digest, names):
+        """Error for a file with the same content as one before it in names, None for the first copy"""
+        if digest is None:
+            return None
+        if digest not in names:
+            names[digest] = input_name(file)
+            return None
+
+        error = {"file": input_name(file), "reason": "Duplicate file", "remarks": f"Same as {names[digest]}"}
+        print(f"Skipping file: '{input_name(file)}'. Same as '{names[digest]}'.")
+        if self.journal is not None:
+            self.journal.record(file, None, error, digest)
+        return error
+
+    def _check_duplicate_policy(self, file, record, digest=None):
+        """The record of file, or an error when the policy index has its policy from another file"""
+        row, error = record
+        if error is not None or self.policy_index is None or not row.get("PolicyNo"):
+            return record
+
+        # Files are told apart by content, the same file moved, renamed or parsed again isn't a duplicate
+        if digest is None:
+            digest = _file_digest(file)
+        name = os.path.abspath(file) if isinstance(file, (str, os.PathLike)) else input_name(file)
+        first = self.policy_index.claim(row["PolicyNo"], row["InsurerSAIBA"], digest or name, name)
+        if first is None:
+            return record
+
+        print(f"Skipping file: '{input_name(file)}'. Policy {row['PolicyNo']} was parsed from '{first}'.")
+        return None, {
+            "file": row["file"],
+            "reason": "Duplicate policy",
+            "remarks": f"Policy {row['PolicyNo']} was parsed from {first}",
+        }
+
+    def new_pool(self, workers):
+        """ProcessPoolExecutor of workers processes, each with a copy of this parser for parse_in_worker"""
+        # Imported here, runs with a single worker never start a pool
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Ship a copy without the input list, workers only ever see the files they are given
+        worker_parser = copy.copy(self)
+        worker_parser.input_files = ()
+        # Only the main process checks policies against the index
+        worker_parser.policy_index = None
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(worker_parser, Masters._branch_master),
+        )
+
+    def _chunk_deadline(self, chunk):
+        if not self.timeout:
+            return None
+        # The in-worker alarm should always fire first, this only catches workers stuck in C code
+        return self.timeout * len(chunk) + WORKER_GRACE_SECONDS
+
+    def _parse_files_parallel(self, input_files, digests):
+        from concurrent.futures import Future
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+        from concurrent.futures.process import BrokenProcessPool
+
+        chunks = _input_chunks(map(input_path, input_files), self.chunk_size)
+        # Keep a couple of chunks queued per worker, so workers never idle but memory stays bounded
+        max_pending = self.workers * 2
+
+        pending = deque()
+        pool = self.new_pool(self.workers)
+        try:
+            while True:
+                for chunk in islice(chunks, max_pending - len(pending)):
+                    if _in_memory(chunk[0]):
+                        # PDFs held in memory can't all be pickled (mmaps, open files), they are parsed
+                        # here when their turn comes
+                        pending.append((chunk, None))
+                    else:
+                        chunk_digests = [_known_digest(digests, file) for file in chunk]
+                        try:
+                            future = pool.submit(_parse_chunk_in_worker, chunk, chunk_digests)
+                        except BrokenProcessPool as e:
+                            # A worker died since the last results came in, handled when the chunk's turn comes
+                            future = Future()
+                            future.set_exception(e)
+                        pending.append((chunk, future))
+                if not pending:
+                    break
+
+                chunk, future = pending.popleft()
+                if future is None:
+                    yield from map(self.parse_file, chunk)
+                    continue
+                try:
+                    yield from _merge_worker_results(future.result(timeout=self._chunk_deadline(chunk)))
+                except (BrokenProcessPool, FutureTimeoutError):
+                    # A worker died or hung. We can't tell which file caused it, so re-run everything
+                    # that was in flight one file at a time, then carry on with a fresh pool.
+                    kill_pool(pool)
+                    suspects = chunk + [file for in_flight, _ in pending for file in in_flight]
+                    pending.clear()
+                    for file in suspects:
+                        yield self.parse_file(file) if _in_memory(file) else self._parse_isolated(file)
+                    pool = self.new_pool(self.workers)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _parse_isolated(self, file):
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = self.new_pool(1)
+        try:
+            [result] = _merge_worker_results(
+                pool.submit(_parse_chunk_in_worker, [file], [None]).result(timeout=self._chunk_deadline([file]))
+            )
+            return result
+        except (BrokenProcessPool, FutureTimeoutError) as e:
+            kill_pool(pool)
+            reason = "Timed out" if isinstance(e, FutureTimeoutError) else "Worker process crashed"
+            print(f"Unable to read file: '{input_name(file)}'. {reason}.")
+            error = {"file": input_name(file), "reason": f"Unable to read PDF. {reason}."}
+            if self.journal is not None:
+                self.journal.record(file, None, error)
+            return None, error
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_files(directory, suffix):
+    """Yield the paths of the files under directory ending with suffix (in any case), as they are found.
+
+    Like a recursive glob, hidden files and directories are left out, but files are yielded while
+    the rest of the tree is still being listed.
+    """
+    suffix = suffix.lower()
+    directories = [directory]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            continue
+        with entries:
+            subdirectories = []
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir():
+                        subdirectories.append(entry.path)
+                    elif entry.name.lower().endswith(suffix):
+                        yield entry.path
+                except OSError:
+                    continue
+        # Depth first, in listing order
+        directories.extend(reversed(subdirectories))
+
+
+def input_path(input_file):
+    """What to read an input from: a path, or a PDF already in memory (bytes, mmap, file-like)"""
+    if isinstance(input_file, (str, os.PathLike)) or not hasattr(input_file, "file"):
+        return input_file
+    return input_file.file
+
+
+def _in_memory(file):
+    return not isinstance(file, (str, os.PathLike))
+
+
+def _input_chunks(files, size):
+    """Yield lists of up to size files, in order. Files held in memory come in a list of their own."""
+    chunk = []
+    for file in files:
+        if _in_memory(file):
+            if chunk:
+                yield chunk
+                chunk = []
+            yield [file]
+            continue
+        chunk.append(file)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _file_digest(file):
+    """SHA-256 of the content of a file on disk, None for PDFs held in memory and files that can't be read"""
+    if _in_memory(file):
+        return None
+    try:
+        return file_digest(file)
+    except OSError:
+        # Left to parsing to report
+        return None
+
+
+def _known_digest(digests, input_file):
+    file = input_path(input_file)
+    return None if _in_memory(file) else digests.pop(file, None)
+
 
-        return (extracted_data, error_data)
+def input_name(file):
+    """Name of an input in reports, its path or the name of a file-like object"""
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    return getattr(file, "name", None) or "<in memory>"
+
+
+@contextmanager
+def file_timeout(seconds):
+    # SIGALRM is only available on Unix, and only from the main thread
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise TimeoutError(f"Timed out after {seconds} seconds")
+
+    previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+# Extra time given to a worker over its per-file timeouts before it is killed
+WORKER_GRACE_SECONDS = 30
+
+_worker_parser = None
+
+
+def _init_worker(parser, branch_master):
+    global _worker_parser
+    _worker_parser = parser
+    _worker_parser.configure_parsers()
+    Masters._branch_master = branch_master
+    Masters._branch_indexes = {}
+
+
+def parse_in_worker(input_file, processing_date=None):
+    """Parse a single input file in a process of a new_pool pool, on processing_date if given.
+
+    Returns a ``(row, error)`` tuple, exactly one of which is set.
+    """
+    if processing_date is not None and processing_date != _worker_parser.processing_date:
+        _worker_parser.set_processing_date(processing_date)
+    return _worker_parser.parse_file(input_file)
+
+
+def _parse_chunk_in_worker(files, digests):
+    results = [_worker_parser.parse_file(file, digest) for file, digest in zip(files, digests)]
+    return (
+        results,
+        profiling.profiler.drain() if profiling.profiler else [],
+        pattern_stats.stats.drain() if pattern_stats.stats else {},
+    )
+
+
+def _merge_worker_results(worker_results):
+    results, profiled_files, pattern_counts = worker_results
+    if profiling.profiler is not None:
+        profiling.profiler.merge(profiled_files)
+    if pattern_stats.stats is not None:
+        pattern_stats.stats.merge(pattern_counts)
+    return results
+
+
+def kill_pool(pool):
+    """Kill the processes of a pool, along with the tasks they are running"""
+    # ProcessPoolExecutor has no public way to stop a running task, so kill its processes outright
+    for process in list((pool._processes or {}).values()):
+        process.kill()
 
 
 def pdf_to_csv(args):
     input_count = 0
     success_count = 0
     error_count = 0
-    error_data = []
 
     # Validation checks for input arguments
-    if args.input_files and args.input_dir:
-        sys.stderr.write("Only one of either input_files or input_directory can be given\n")
+    if len([arg for arg in (args.input_files, args.input_dir, args.text_dir) if arg]) > 1:
+        sys.stderr.write("Only one of either input_files, input_directory or text directory can be given\n")
         return 1
 
+    # Directories are listed as files are parsed, parsing starts before a large tree is fully listed
     if args.input_dir:
-        input_files = glob.glob(glob.escape(args.input_dir) + "/**/*.[pP][dD][fF]", recursive=True)
+        input_files = scan_files(args.input_dir, ".pdf")
     elif args.input_files:
         input_files = args.input_files
+    elif args.text_dir:
+        input_files = scan_files(args.text_dir, TEXT_SUFFIX)
     else:
-        sys.stderr.write("Either input_files or input_directory must be given\n")
+        sys.stderr.write("Either input_files, input_directory or text directory must be given\n")
+        return 1
+
+    if args.resume and args.incremental:
+        # A resumed run writes out every file again, an incremental one only the files it parses
+        sys.stderr.write("Only one of either --resume or --incremental can be given\n")
+        return 1
+
+    if args.adaptive_patterns and not args.pattern_stats_path:
+        sys.stderr.write("--adaptive-patterns needs the hit rates recorded in --pattern-stats\n")
         return 1
 
     # Read master files
@@ -379,40 +898,83 @@ def pdf_to_csv(args):
     # Create output directories if they don't exist
     output_file.parent.mkdir(parents=True, exist_ok=True)
 
-    # Unless successful, consider all as errors, hence error count = input count
-    input_count = error_count = len(input_files)
+    journal = None
+    if args.journal or args.resume or args.incremental:
+        journal = Journal(args.journal or journal_path(output_file))
+        if not (args.resume or args.incremental):
+            journal.clear()
+    # Kept across runs, unlike the journal's record of the files
+    policy_index = PolicyIndex(args.policy_index) if args.policy_index else None
 
     parser = PolicyParser(
-        date=args.processing_date, files=input_files, txt_file_directory=args.generate_txt_file
+        date=args.processing_date,
+        files=input_files,
+        txt_file_directory=args.generate_txt_file,
+        workers=args.workers,
+        timeout=args.timeout,
+        chunk_size=args.chunk_size,
+        cache=None if args.no_cache else ExtractionCache(args.cache_dir, args.cache_size * 1024 * 1024),
+        pattern_budget=args.pattern_budget,
+        profile=bool(args.profile),
+        date_fallback=args.date_fallback,
+        journal=journal,
+        resume=args.resume,
+        from_text=bool(args.text_dir),
+        incremental=args.incremental,
+        policy_index=policy_index,
+        pattern_stats_path=args.pattern_stats_path,
+        adaptive_patterns=args.adaptive_patterns,
     )
-    with ExcelDictWriter(output_file) as writer:
-        print(f"Processing {input_count} PDF Files...")
-        writer.add_headers(SAIBA_HEADERS)
-        extracted_data, error_data = parser.extract_data_from_pdf()
-        error_count = len(error_data)
-        success_count = len(extracted_data)
-
-        serial_number = 1
-        for row in extracted_data:
-            row["Sno"] = serial_number
-            try:
-                writer.add_row(row)
-            except Exception as e:
-                print(e)
-                print(row)
-                raise
-            serial_number += 1
-    print("Processing complete.")
-
     error_file = Path(args.error_file)
     # Create output directories if they don't exist
     error_file.parent.mkdir(parents=True, exist_ok=True)
-    with ExcelDictWriter(error_file) as writer:
-        writer.add_headers(["file", "reason", "remarks"])
-        for row in error_data:
-            writer.add_row(row)
 
-    return {"input": input_count, "success": success_count, "error": error_count}
+    # Rows and errors are written as each file is parsed, so with CSV or JSONL output a crash keeps
+    # everything before it. An xlsx workbook only appears once it is complete, after a crash or an
+    # interrupt its rows are only kept in the journal, if there is one, for --resume to write out again
+    try:
+        with get_writer(output_file, args.output_format) as writer, get_writer(error_file) as error_writer:
+            if isinstance(input_files, list):
+                print(f"Processing {len(input_files)} PDF Files...")
+            else:
+                print(f"Processing PDF Files in {args.input_dir or args.text_dir}...")
+            writer.add_headers(SAIBA_HEADERS)
+            error_writer.add_headers(["file", "reason", "remarks"])
+
+            for row, error in parser.extract_data_from_pdf():
+                if error is not None:
+                    error_count += 1
+                    error_writer.add_row(error)
+                    continue
+
+                success_count += 1
+                row["Sno"] = success_count
+                try:
+                    if profiling.profiler is None:
+                        writer.add_row(row)
+                    else:
+                        start = time.perf_counter()
+                        writer.add_row(row)
+                        profiling.profiler.add_write(time.perf_counter() - start)
+                except Exception as e:
+                    print(e)
+                    print(row)
+                    raise
+    finally:
+        if journal is not None:
+            journal.close()
+        if policy_index is not None:
+            policy_index.close()
+        # The hit rates of the files parsed before a failure are kept too
+        parser.save_pattern_stats()
+    input_count = success_count + error_count + (parser.skipped if args.incremental else 0)
+    print("Processing complete.")
+
+    if args.profile:
+        profiling.profiler.write_summary(args.profile)
+        print(f"Profile written to {args.profile}")
+
+    return {"input": input_count, "success": success_count, "error": error_count, "skipped": parser.skipped}
 
 
 if __name__ == "__main__":
@@ -428,12 +990,25 @@ if __name__ == "__main__":
         type=str,
         help="Directory to process",
     )
+    parser.add_argument(
+        "--from-text",
+        metavar="text directory",
+        dest="text_dir",
+        type=str,
+        help="Directory of text files written by --gentxt to parse instead of the PDFs",
+    )
     parser.add_argument(
         "--error", "-e", dest="error_file", type=str, help="Error Report File", default="errors.csv"
     )
     parser.add_argument(
         "--output", "-o", dest="output_file", type=str, help="Output File", required=True
     )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=sorted(WRITERS),
+        help="Output file format, by default the one the output file's extension names, else xlsx",
+    )
     parser.add_argument(
         "--branches", "-b", dest="branch_master", type=str, help="Branch Master", required=True
     )
@@ -453,9 +1028,115 @@ if __name__ == "__main__":
         required=True,
     )
 
+    parser.add_argument(
+        "--workers",
+        "-w",
+        dest="workers",
+        type=int,
+        help="Number of worker processes to parse files with",
+        default=1,
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        help="Per-file timeout in seconds",
+        default=None,
+    )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        type=int,
+        help="Number of files sent to a worker process at a time",
+        default=8,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        help="Directory to cache the text extracted from PDFs in, %(default)s by default. The cache is "
+        "used unless --no-cache is given",
+        default=DEFAULT_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size",
+        type=int,
+        help="Maximum size of the extraction cache in MB",
+        default=DEFAULT_MAX_SIZE // (1024 * 1024),
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Always extract text from PDFs, without reading or writing the cache",
+    )
+    parser.add_argument(
+        "--pattern-budget",
+        dest="pattern_budget",
+        type=float,
+        help="Seconds a single regex may spend on a policy before it is aborted",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        type=str,
+        help="File to write a per-stage timing summary to (.json or .csv)",
+    )
+    parser.add_argument(
+        "--dateparser-fallback",
+        dest="date_fallback",
+        action="store_true",
+        help="Hand dates that match none of the known formats to dateparser",
+    )
+    parser.add_argument(
+        "--journal",
+        dest="journal",
+        type=str,
+        help="Journal of parsed files to resume from, defaults to <output>.journal. Only kept with "
+        "--journal, --resume or --incremental",
+    )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help="Skip files the journal already has, writing their recorded rows instead",
+    )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        help="Only parse files that are new or changed since the journal recorded them, or that failed, "
+        "the output has just their rows. Give the same --journal to every run when output file names change. "
+        "Not with --resume",
+    )
+    parser.add_argument(
+        "--policy-index",
+        dest="policy_index",
+        type=str,
+        help="Index of the policies parsed so far, kept across runs, a policy found again in a file with "
+        "other content is reported as a duplicate. Off unless given",
+    )
+    parser.add_argument(
+        "--pattern-stats",
+        dest="pattern_stats_path",
+        type=str,
+        help="JSON file to add the hit rate and time of every pattern to, see benchmarks/pattern_report.py. "
+        "Runs at the same time need a file each, only the last to finish is kept in a shared one",
+    )
+    parser.add_argument(
+        "--adaptive-patterns",
+        dest="adaptive_patterns",
+        action="store_true",
+        help="Try the patterns of each field cheapest to hit first, by the hit rates in --pattern-stats. "
+        "May change which pattern wins when several match",
+    )
+
     parser.add_argument("--remote", "-r", dest="remote_string", type=str, help="Remote String")
 
     args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s: %(message)s")
 
     result = pdf_to_csv(args)
     print(f"\nExecution Timestamp: {datetime.now().isoformat()}")
@@ -463,3 +1144,5 @@ if __name__ == "__main__":
     print(f"Total Files Processed: {result['input']}")
     print(f"Successful Files: {result['success']}")
     print(f"Files with error: {result['error']}")
+    if args.incremental:
+        print(f"Files skipped (unchanged): {result['skipped']}")
@@ -1,32 +1,96 @@
-import re
-
+from parsers import profiling
 from parsers.reader import PdfReader
 from parsers.base import BasePolicyParser
-from parsers.sbi import SbiPolicyParser
-from parsers.new_india import NewIndiaPolicyParser
-from parsers.icici_lombard import IciciLombardPolicyParser
+from parsers.classifier import insurer_classifier
 
+# Signatures of each insurer's policies. Insurer modules compile their patterns on import, so they are
+# only imported once one of their policies is found. The order below is the order of precedence when
+# signatures of several insurers are found.
+insurer_classifier.register_lazy(
+    "parsers.sbi.SbiPolicyParser",
+    [
+        r"Welcome\s*to\s*(the)?\s*SBI\s*General",
+    ],
+)
+insurer_classifier.register_lazy(
+    "parsers.new_india.NewIndiaPolicyParser",
+    [
+        r"THE\s*NEW\s*INDIA\s*ASSURANCE\s*CO.\s*LTD.\s*\(Government\s*of\s*India\s*Undertaking\)",
+    ],
+)
+insurer_classifier.register_lazy(
+    "parsers.icici_lombard.IciciLombardPolicyParser",
+    [
+        r"Thank\s*you\s*for\s*choosing\s*ICICI\s*Lombard",
+        r"We\s*value\s*your\s*relationship\s*with\s*ICICI\s*Lombard",
+    ],
+)
 
-def get_policy_parser(input_file, generate_txt_file=None):
-    pdf_reader = PdfReader(input_file)
-    pdf_content = pdf_reader.read_file_pypdf()
+# Characters of the previous page searched again along with a new page, so a signature broken
+# across a page boundary is still found
+SIGNATURE_OVERLAP = 200
 
-    if re.search(r"Welcome\s*to\s*(the)?\s*SBI\s*General", pdf_content, flags=re.I):
-        # print("SBI Policy")
-        return SbiPolicyParser(pdf_content)
-    elif re.search(
-        r"THE\s*NEW\s*INDIA\s*ASSURANCE\s*CO.\s*LTD.\s*\(Government\s*of\s*India\s*Undertaking\)",
-        pdf_content,
-        flags=re.I,
-    ):
-        # print("New India Policy")
-        return NewIndiaPolicyParser(pdf_content)
-    elif re.search(r"Thank\s*you\s*for\s*choosing\s*ICICI\s*Lombard", pdf_content, flags=re.I) or re.search(
-        r"We\s*value\s*your\s*relationship\s*with\s*ICICI\s*Lombard", pdf_content, flags=re.I
-    ):
-        # For icici policies, pdfminer works better in some scenarios, so re-read the file accordingly
-        pdf_content += "\nBEGINPDFMINER\n" + pdf_reader.read_file_pdfminer()
-        return IciciLombardPolicyParser(pdf_content)
+# Separates the pypdf text of a policy from the pdfminer text of insurers that also read it
+PDFMINER_MARKER = "\nBEGINPDFMINER\n"
+
+
+def get_policy_parser(
+    input_file, generate_txt_file=None, cache=None, enabled_insurers=None, pattern_budget=None, digest=None
+):
+    # Closing the reader unmaps the file, once all the text the policy needs is extracted
+    with PdfReader(input_file, cache=cache, digest=digest) as pdf_reader:
+        # Signatures are almost always on the first page, so detect page by page and stop extracting early.
+        # Each page is searched along with the end of the text before it, the same text as searching the
+        # whole content from SIGNATURE_OVERLAP characters before the page, without joining the pages
+        classification = None
+        searched = ""
+        for page in pdf_reader.iter_pages_pypdf():
+            window = searched[-SIGNATURE_OVERLAP:] + "\n" + page
+            if profiling.profiler is None:
+                classification = insurer_classifier.classify(window)
+            else:
+                classification = profiling.profiler.time("detect", insurer_classifier.classify, window)
+            if classification:
+                break
+            searched = window
+
+        if classification is None:
+            # print("Unidentified Policy")
+            return BasePolicyParser(pdf_reader.extracted_content)
+
+        parser_class = classification.parser_class
+        if enabled_insurers is not None and parser_class("").get_insurer() not in enabled_insurers:
+            # The policy is going to be rejected, don't read the rest of it
+            pdf_content = pdf_reader.extracted_content
+        else:
+            pdf_content = pdf_reader.read_file_pypdf()
+            if parser_class.PDFMINER_PAGES_PATTERN:
+                # For some insurers (icici), pdfminer works better in some scenarios, so re-read the file
+                # accordingly. pdfminer is slow, so only run it over the pages the patterns actually look at.
+                page_numbers = pdf_reader.find_pages(
+                    parser_class.PDFMINER_PAGES_PATTERN, following=parser_class.PDFMINER_FOLLOWING_PAGES
+                )
+                pdf_content += PDFMINER_MARKER + pdf_reader.read_file_pdfminer(page_numbers)
+
+    policy = parser_class(pdf_content, pattern_budget=pattern_budget)
+    policy.matched_signature = classification.signature
+    return policy
+
+
+def get_text_policy_parser(content, pattern_budget=None):
+    """Policy parser for the text of a policy saved with --gentxt, without reading the PDF again.
+
+    `content` is the text exactly as it was parsed, including the pdfminer text after BEGINPDFMINER
+    for insurers that read it. The insurer is detected on the pypdf text only, as it is for PDFs.
+    """
+    pypdf_content = content.split(PDFMINER_MARKER, 1)[0]
+    if profiling.profiler is None:
+        classification = insurer_classifier.classify(pypdf_content)
     else:
-        # print("Unidentified Policy")
-        return BasePolicyParser(pdf_content)
+        classification = profiling.profiler.time("detect", insurer_classifier.classify, pypdf_content)
+    if classification is None:
+        return BasePolicyParser(content)
+
+    policy = classification.parser_class(content, pattern_budget=pattern_budget)
+    policy.matched_signature = classification.signature
+    return policy
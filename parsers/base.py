@@ -3,10 +3,32 @@ class Insurers:
     SBI = "SBI"
     NEW_INDIA = "New India"
     ICICI_LOMBARD = "ICICI Lombard"
+    HDFC_ERGO = "HDFC ERGO"
+    DIGIT = "Digit"
+    ORIENTAL = "Oriental"
+    UNITED = "United India"
+    NATIONAL = "National"
+    RELIANCE = "Reliance"
+    ROYAL_SUNDARAM = "Royal Sundaram"
+    IFFCO_TOKIO = "IFFCO Tokio"
+    LIBERTY = "Liberty"
+    UNIVERSAL_SOMPO = "Universal Sompo"
     NOT_AVAILABLE = "NOT_AVAILABLE"
 
 
 class BasePolicyParser(object):
+    # Regex sources identifying the insurer's policies, for classes registered with
+    # InsurerClassifier.register. The insurers in this package register theirs in parsers/__init__.py
+    SIGNATURES = []
+
+    # When set, pages matching this pattern are also read with pdfminer and appended after BEGINPDFMINER
+    PDFMINER_PAGES_PATTERN = None
+    # Pages after each matching page read along with it, so text running over a page break is kept
+    PDFMINER_FOLLOWING_PAGES = 0
+
+    # The signature the policy was identified with
+    matched_signature = None
+
     def __init__(self, content, *args, **kwargs):
         self.content = content
 
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the cleaning in PdfReader changes, so stale text is never served
+CACHE_FORMAT_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "pdf-parser"
+)
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+def extractor_version(extractor):
+    # Imported when first needed, like the extractors themselves, see PdfReader
+    if extractor == "pypdf":
+        import PyPDF2
+
+        return PyPDF2.__version__
+    import pdfminer
+
+    return pdfminer.__version__
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache(object):
+    """On-disk cache of the cleaned text extracted from PDFs.
+
+    Entries are keyed by the hash of the PDF's content together with the extractor and its version,
+    so re-running a batch after a pattern change skips extraction entirely. The cache is capped at
+    `max_size` bytes, least recently used entries are evicted first.
+
+    The cache never fails a PDF: entries that can't be read are misses and entries that can't be
+    written are left out, either is logged and the text is extracted as if there was no cache.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self._size = None
+
+    def _path(self, digest, extractor, variant):
+        key = f"{CACHE_FORMAT_VERSION}:{extractor}:{extractor_version(extractor)}:{variant}:{digest}"
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, name[:2], f"{name}.txt")
+
+    def get(self, digest, extractor, variant=""):
+        path = self._path(digest, extractor, variant)
+        try:
+            with open(path, encoding="utf-8") as cache_file:
+                text = cache_file.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning("Unable to read cached text %s: %s", path, e)
+            return None
+
+        # Touch the entry, eviction goes by modification time
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def set(self, digest, extractor, text, variant=""):
+        path = self._path(digest, extractor, variant)
+        try:
+            self._set(path, text)
+        except OSError as e:
+            logger.warning("Unable to cache text in %s: %s", path, e)
+
+    def _set(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # An entry being replaced no longer counts towards the size
+            replaced_size = os.path.getsize(path)
+        except OSError:
+            replaced_size = 0
+
+        # Write to a temporary file first, other processes may be reading the same entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+                temp_file.write(text)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in self._entries())
+        else:
+            self._size += os.path.getsize(path) - replaced_size
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if entry.name.endswith(".txt"))
+
+    def evict(self):
+        """Delete least recently used entries until the cache is below 90% of its size cap."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_size * 0.9
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def clear(self):
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        self._size = 0
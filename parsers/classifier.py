@@ -0,0 +1,108 @@
+import importlib
+import re
+from collections import namedtuple
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+Classification = namedtuple("Classification", ["parser_class", "signature"])
+
+
+def required_literals(signature):
+    """Return the lowercased literal runs that every match of `signature` must contain.
+
+    Only runs at the top level of the pattern are considered, anything inside groups, repeats or
+    alternations may not be part of a match.
+    """
+    literals = []
+    run = []
+    for op, value in sre_parse.parse(signature, re.I):
+        if op is sre_constants.LITERAL:
+            run.append(chr(value))
+            continue
+        if run:
+            literals.append("".join(run).lower())
+            run = []
+    if run:
+        literals.append("".join(run).lower())
+    return literals
+
+
+class InsurerClassifier(object):
+    """Detects the insurer of a policy from signatures registered by each parser class.
+
+    Every signature is reduced to the literal text its matches must contain. The text is lowercased
+    once, and a signature's regex only runs when all of its literals are found in it. Each distinct
+    literal is looked for once, with a substring search that is far cheaper than a regex search, so
+    the cost still grows with the number of insurers but much more slowly than running every
+    signature. A single alternation of all the literals was tried and is slower, Python's re tries
+    the alternatives one by one at each position. When signatures of several insurers are present,
+    the insurer registered first wins.
+
+    Parser classes can be registered by their dotted path, their module is then only imported once
+    one of their policies is found.
+    """
+
+    def __init__(self):
+        self._signatures = []
+        self._entries = []
+        self._classes = {}
+
+    def register(self, parser_class):
+        """Register the `SIGNATURES` of `parser_class`, usable as a class decorator."""
+        self._add(parser_class, parser_class.SIGNATURES)
+        return parser_class
+
+    def register_lazy(self, class_path, signatures):
+        """Register `signatures` for the parser class at `class_path`, imported when first detected."""
+        self._add(class_path, signatures)
+
+    def _add(self, parser_class, signatures):
+        for signature in signatures:
+            self._signatures.append(Classification(parser_class, signature))
+            # Longest literals first, they are the least likely to be found by chance
+            literals = sorted(set(required_literals(signature)), key=len, reverse=True)
+            self._entries.append((re.compile(signature, flags=re.I), literals))
+
+    def copy(self):
+        classifier = InsurerClassifier()
+        classifier._signatures = list(self._signatures)
+        classifier._entries = list(self._entries)
+        classifier._classes = self._classes
+        return classifier
+
+    def load(self, parser_class):
+        """The class registered as `parser_class`, importing its module if it was registered by path."""
+        if not isinstance(parser_class, str):
+            return parser_class
+        if parser_class not in self._classes:
+            module, _, name = parser_class.rpartition(".")
+            self._classes[parser_class] = getattr(importlib.import_module(module), name)
+        return self._classes[parser_class]
+
+    def parser_classes(self):
+        """Every registered parser class in order of precedence, importing them all."""
+        return [self.load(parser_class) for parser_class in dict.fromkeys(p for p, _ in self._signatures)]
+
+    def classify(self, content, pos=0):
+        """Return the Classification of `content`, searching from `pos`, or None if nothing matches."""
+        lowered = content[pos:].lower()
+        found = {}
+        for index, (pattern, literals) in enumerate(self._entries):
+            for literal in literals:
+                if literal not in found:
+                    found[literal] = literal in lowered
+                if not found[literal]:
+                    break
+            else:
+                if pattern.search(content, pos):
+                    parser_class, signature = self._signatures[index]
+                    return Classification(self.load(parser_class), signature)
+        return None
+
+
+insurer_classifier = InsurerClassifier()
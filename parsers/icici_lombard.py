@@ -1,10 +1,24 @@
 import re
 
-from parsers.regex_parser import RegexPolicyParser
+from parsers.regex_parser import RegexPolicyParser, cached_field
 from parsers.base import Insurers
 
 
 class IciciLombardPolicyParser(RegexPolicyParser):
+    # Pages re-read with pdfminer: those with the insured and vehicle schedule tables, the only
+    # fields whose patterns (insured name, partner code address, make, model, body type, year of
+    # manufacture, IDV) are written against pdfminer's column order. Generic labels like Premium or
+    # Policy No are on nearly every page of the policy wording, they would select the whole document.
+    PDFMINER_PAGES_PATTERN = re.compile(
+        r"Insured\s*Name|Name\s*Of\s*the\s*Insured|Partner\s*Code|Type\s*of\s*Body|Mfg\s*Yr|Total\s*IDV",
+        flags=re.I,
+    )
+    # Schedule tables can run over onto the next page
+    PDFMINER_FOLLOWING_PAGES = 1
+
+    # PDFMINER regexs have to stay first, see below, the adaptive mode leaves the order alone
+    REORDER_PATTERNS = False
+
     # Ensure that PDFMINER regexs always come first, since they have to be more restrictive
     class RE(RegexPolicyParser.RE):
         CUST_NAME_PATTERNS = [
@@ -126,35 +140,38 @@ class IciciLombardPolicyParser(RegexPolicyParser):
     def get_insurer(self):
         return Insurers.ICICI_LOMBARD
 
+    @cached_field
     def get_policy_type(self):
         # Two Wheeler
-        if re.search(r"Two\s*Wheeler\s*Vehicles[\w\s]*Policy", self.content, flags=re.I):
+        if self.contains(r"Two\s*Wheeler\s*Vehicles[\w\s]*Policy", flags=re.I):
             return "Motor Two Wheeler Policy"
-        elif re.search(r"Two\s*wheeler\s*Insurance\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Two\s*wheeler\s*Insurance\s*Policy", flags=re.I):
             return "Motor Two Wheeler Policy"
 
         # Private Car
-        elif re.search(r"Private\s*Car\s*Package\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Private\s*Car\s*Package\s*Policy", flags=re.I):
             return "Motor Private Car Package Policy"
-        elif re.search(r"Private\s*Car\s*Liability\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Private\s*Car\s*Liability\s*Policy", flags=re.I):
             return "Motor Liability Policy"
-        elif re.search(r"Stand-Alone\s*Own\s*Damage\s*Private\s*Car\s*Insurance\s*Policy", self.content):
+        elif self.contains(r"Stand-Alone\s*Own\s*Damage\s*Private\s*Car\s*Insurance\s*Policy"):
             return "Motor Standalone OD Policy"
 
         # GCV
-        elif re.search(r"Goods\s*Carrying\s*Vehicles[\w\s]*Policy", self.content, flags=re.I):
+        elif self.contains(r"Goods\s*Carrying\s*Vehicles[\w\s]*Policy", flags=re.I):
             return "Motor GCV Policy"
-        elif re.search(r"Miscellaneous\s*Vehicles[\w\s]*Policy", self.content, flags=re.I):
+        elif self.contains(r"Miscellaneous\s*Vehicles[\w\s]*Policy", flags=re.I):
             return "Motor Misc Policy"
 
         # PCV
-        elif re.search(r"Passenger\s*Carrying\s*Vehicles[\w\s]*Policy", self.content, flags=re.I):
+        elif self.contains(r"Passenger\s*Carrying\s*Vehicles[\w\s]*Policy", flags=re.I):
             return "Motor PCV Policy"
 
+    @cached_field
     def get_rto_location(self):
         rto_location_pattern = [re.compile(r"RTO\s*Location\s*:([\-\w ]+)", flags=re.M | re.I)]
-        return self.extract_information(rto_location_pattern, "rto_location")
+        return self.extract_information(rto_location_pattern)
 
+    @cached_field
     def get_reg_no(self):
         value = super().get_reg_no()
         if value:
@@ -169,8 +186,9 @@ class IciciLombardPolicyParser(RegexPolicyParser):
             + r"\s*(NEW|[A-Z]{2}[- ]?[0-9]{1,2}[- ]?[A-Z]+[- ]?[0-9]{1,4}|[A-Z]{2}[ -]?[A-Z0-9]{1,2}[- ]?[0-9]{1,4})",
             flags=re.M | re.I,
         )
-        return self.extract_information([reg_no_pattern], "registration_number")
+        return self.extract_information([reg_no_pattern])
 
+    @cached_field
     def get_make(self):
         value = super().get_make()
         if value:
@@ -181,8 +199,9 @@ class IciciLombardPolicyParser(RegexPolicyParser):
             return ""
 
         secondary_pattern = re.compile(rf"^([\w\&\d\. ]+)/[\w\&\d\. \/]+\s*{rto_location}", flags=re.M | re.I)
-        return self.extract_information([secondary_pattern], "make")
+        return self.extract_information([secondary_pattern])
 
+    @cached_field
     def get_model(self):
         value = super().get_model()
         if value:
@@ -193,8 +212,9 @@ class IciciLombardPolicyParser(RegexPolicyParser):
             return ""
 
         secondary_pattern = re.compile(rf"/([\w\&\d\. \/]+)\s*{rto_location}", flags=re.M | re.I)
-        return self.extract_information([secondary_pattern], "model")
+        return self.extract_information([secondary_pattern])
 
+    @cached_field
     def get_net_premium(self):
         value = super().get_net_premium()
         if value:
@@ -206,6 +226,7 @@ class IciciLombardPolicyParser(RegexPolicyParser):
         except Exception:
             return ""
 
+    @cached_field
     def get_taxes(self):
         value = super().get_taxes()
         if value:
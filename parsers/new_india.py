@@ -1,10 +1,13 @@
 import re
 
-from parsers.regex_parser import RegexPolicyParser
+from parsers.regex_parser import RegexPolicyParser, cached_field
 from parsers.base import Insurers
 
 
 class NewIndiaPolicyParser(RegexPolicyParser):
+    # Lists where a later pattern also matches what an earlier one does, with another value
+    FIXED_ORDER_PATTERNS = frozenset({"REG_NO_PATTERNS", "MODEL_PATTERNS", "POLICY_NUM_PATTERNS"})
+
     class RE(RegexPolicyParser.RE):
         CUST_NAME_PATTERNS = [
             re.compile(r"Insured(?:'s)?\s*Name[\s:]+([\w\.\/\d \t]+)\s+Customer"),  # Policy Details Table
@@ -130,33 +133,35 @@ class NewIndiaPolicyParser(RegexPolicyParser):
     def get_insurer(self):
         return Insurers.NEW_INDIA
 
+    @cached_field
     def get_policy_type(self):
         # Two Wheeler
-        if re.search(r"Two\s*Wheeler\s*Package\s*Policy", self.content, flags=re.I):
+        if self.contains(r"Two\s*Wheeler\s*Package\s*Policy", flags=re.I):
             return "Motor Two Wheeler Policy"
-        elif re.search(r"Two\s*Wheeler\s*Liability\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Two\s*Wheeler\s*Liability\s*Policy", flags=re.I):
             return "Motor Two Wheeler Policy"
-        elif re.search(r"Two\s*Wheeler\s*Liability\s*Only\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Two\s*Wheeler\s*Liability\s*Only\s*Policy", flags=re.I):
             return "Motor Two Wheeler Policy"
 
         # Private Car
-        elif re.search(r"Private\s*Car\s*Package\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Private\s*Car\s*Package\s*Policy", flags=re.I):
             return "Motor Private Car Package Policy"
-        elif re.search(r"Private\s*Car\s*Liability\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Private\s*Car\s*Liability\s*Policy", flags=re.I):
             return "Motor Liability Policy"
-        elif re.search(r"Private\s*Car\s*Liability\s*Only\s*Policy", self.content, flags=re.I):
+        elif self.contains(r"Private\s*Car\s*Liability\s*Only\s*Policy", flags=re.I):
             return "Motor Liability Policy"
 
         # GCV
-        elif re.search(r"A\s*-\s*Goods\s*Carrying", self.content, flags=re.I):
+        elif self.contains(r"A\s*-\s*Goods\s*Carrying", flags=re.I):
             return "Motor GCV Policy"
-        elif re.search(r"D\s*-\s*Misc\s*-\s*Special\s*Type", self.content, flags=re.I):
+        elif self.contains(r"D\s*-\s*Misc\s*-\s*Special\s*Type", flags=re.I):
             return "Motor Misc Policy"
 
         # PCV
-        elif re.search(r"C\s*-\s*Passenger\s*Carrying", self.content, flags=re.I):
+        elif self.contains(r"C\s*-\s*Passenger\s*Carrying", flags=re.I):
             return "Motor PCV Policy"
 
+    @cached_field
     def get_receipt_number(self):
         value = super().get_receipt_number()
         if value and value.strip().lower() in ("reference", "receipt"):
@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+from collections import defaultdict
+
+# The active PatternStats recording the patterns tried, None when not recording. Checked like
+# profiling.profiler, so recording costs nothing when disabled.
+stats = None
+
+# The PatternOrder pattern lists are tried in, None to try them in the order they are written
+order = None
+
+# Tries a pattern needs before its hit rate is trusted to move it
+MIN_TRIES = 20
+
+STATS_FORMAT_VERSION = 1
+
+
+def enable():
+    global stats
+    stats = PatternStats()
+    return stats
+
+
+def disable():
+    global stats
+    stats = None
+
+
+def set_order(pattern_order):
+    global order
+    order = pattern_order
+
+
+class PatternStats(object):
+    """Hits, misses and time of every pattern of the policy parsers, kept in a JSON file across runs.
+
+    A pattern is counted each time extract_information tries it: a hit when it gives a non-empty
+    value, a miss otherwise. Patterns after the one that hits aren't tried, so counts are of the
+    times a pattern was reached. Patterns are keyed by their parser class, pattern list and source,
+    so counts follow a pattern when the list is edited or reordered.
+    """
+
+    def __init__(self):
+        # (parser, list, pattern source) -> [hits, misses, seconds]
+        self.counts = defaultdict(lambda: [0, 0, 0.0])
+
+    def add(self, parser, list_name, pattern, hit, seconds):
+        counts = self.counts[(parser, list_name, pattern.pattern)]
+        counts[0 if hit else 1] += 1
+        counts[2] += seconds
+
+    def get(self, parser, list_name, pattern):
+        """``(hits, misses, seconds)`` of a pattern, zeros if it was never tried"""
+        counts = self.counts.get((parser, list_name, pattern.pattern))
+        return tuple(counts) if counts else (0, 0, 0.0)
+
+    def drain(self):
+        """Return and forget the counts so far, used to send them back from worker processes."""
+        counts, self.counts = dict(self.counts), defaultdict(lambda: [0, 0, 0.0])
+        return counts
+
+    def merge(self, counts):
+        for key, (hits, misses, seconds) in counts.items():
+            total = self.counts[key]
+            total[0] += hits
+            total[1] += misses
+            total[2] += seconds
+
+    @classmethod
+    def load(cls, path):
+        """Stats stored in path, empty when the file doesn't exist yet"""
+        stats = cls()
+        try:
+            with open(path) as stats_file:
+                stored = json.load(stats_file)
+        except FileNotFoundError:
+            return stats
+        if stored.get("version") != STATS_FORMAT_VERSION:
+            return stats
+        for entry in stored["patterns"]:
+            key = (entry["parser"], entry["list"], entry["pattern"])
+            stats.counts[key] = [entry["hits"], entry["misses"], entry["seconds"]]
+        return stats
+
+    def save(self, path):
+        patterns = [
+            dict(parser=parser, list=list_name, pattern=pattern, hits=hits, misses=misses, seconds=seconds)
+            for (parser, list_name, pattern), (hits, misses, seconds) in sorted(self.counts.items())
+        ]
+        # Written to a temporary file first, so an interrupted run never leaves half a file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as stats_file:
+            json.dump({"version": STATS_FORMAT_VERSION, "patterns": patterns}, stats_file, indent=1)
+        os.replace(temp_path, path)
+
+
+def cost_to_hit(hits, misses, seconds, min_tries=MIN_TRIES):
+    """Expected seconds spent in a pattern per value it gives, None until it has been tried enough
+
+    The mean time per try divided by the hit rate. Trying patterns in increasing cost to hit
+    minimizes the expected time to the first hit.
+    """
+    if hits + misses < min_tries:
+        return None
+    if not hits:
+        return float("inf")
+    return seconds / hits
+
+
+class PatternOrder(object):
+    """Order to try the patterns of each list in, cheapest expected cost to hit first, from PatternStats.
+
+    Patterns with too few tries to judge, and those that never hit, keep their relative order after
+    the ranked ones. Reordering changes which pattern wins when several would give a value, so it
+    is opt in, and parser classes keep lists whose order is a precedence out of it, see
+    RegexPolicyParser.REORDER_PATTERNS.
+    """
+
+    def __init__(self, stats, min_tries=MIN_TRIES):
+        self.stats = stats
+        self.min_tries = min_tries
+        self._orders = {}
+
+    def indexes(self, parser, list_name, pattern_list):
+        """Indexes of the patterns of pattern_list in the order to try them"""
+        key = (parser, list_name, tuple(pattern_list))
+        if key not in self._orders:
+            costs = [
+                cost_to_hit(*self.stats.get(parser, list_name, pattern), min_tries=self.min_tries)
+                for pattern in pattern_list
+            ]
+
+            def rank(index):
+                cost = costs[index]
+                if cost is None or cost == float("inf"):
+                    return (1, 0)
+                return (0, cost)
+
+            # sorted is stable, unranked patterns keep their relative order
+            self._orders[key] = sorted(range(len(pattern_list)), key=rank)
+        return self._orders[key]
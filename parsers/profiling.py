@@ -0,0 +1,109 @@
+import csv
+import json
+import math
+import time
+from collections import defaultdict
+
+# The active Profiler, None when profiling is disabled. Hooks check this before doing any work, so
+# they cost a single attribute lookup when disabled.
+profiler = None
+
+SUMMARY_FIELDS = ["insurer", "stage", "count", "total", "p50", "p95", "max"]
+
+
+def enable():
+    global profiler
+    profiler = Profiler()
+    return profiler
+
+
+def disable():
+    global profiler
+    profiler = None
+
+
+def percentile(sorted_values, percent):
+    # Nearest rank
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Profiler(object):
+    """Wall time per stage of parsing, per file.
+
+    Stages are named like "extract.pypdf", "detect", "field.get_make", "pattern.MAKE_PATTERNS[2]",
+    "transform" and "write". Time spent in a stage is summed per file, the summary then gives the
+    distribution of those per-file times for each stage, per insurer and over all files.
+    """
+
+    def __init__(self):
+        # (insurer, {stage: seconds}) per file
+        self.files = []
+        self.writes = []
+        self._current = None
+
+    def begin_file(self):
+        self._current = defaultdict(float)
+
+    def add(self, stage, seconds):
+        if self._current is not None:
+            self._current[stage] += seconds
+
+    def end_file(self, insurer):
+        if self._current is not None:
+            self.files.append((insurer, dict(self._current)))
+        self._current = None
+
+    def add_write(self, seconds):
+        self.writes.append(seconds)
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def drain(self):
+        """Return and forget the files profiled so far, used to send them back from worker processes."""
+        files, self.files = self.files, []
+        return files
+
+    def merge(self, files):
+        self.files.extend(files)
+
+    def summary(self):
+        samples = defaultdict(list)
+        for insurer, stages in self.files:
+            for stage, seconds in stages.items():
+                samples[(insurer, stage)].append(seconds)
+                samples[("all", stage)].append(seconds)
+        if self.writes:
+            samples[("all", "write")] = list(self.writes)
+
+        rows = []
+        for (insurer, stage), values in sorted(samples.items()):
+            values.sort()
+            rows.append(
+                {
+                    "insurer": insurer,
+                    "stage": stage,
+                    "count": len(values),
+                    "total": round(sum(values), 6),
+                    "p50": round(percentile(values, 50), 6),
+                    "p95": round(percentile(values, 95), 6),
+                    "max": round(values[-1], 6),
+                }
+            )
+        return rows
+
+    def write_summary(self, path):
+        """Write the summary as JSON if `path` ends with .json, as CSV otherwise."""
+        rows = self.summary()
+        with open(path, "w", newline="") as summary_file:
+            if str(path).lower().endswith(".json"):
+                json.dump(rows, summary_file, indent=2)
+            else:
+                writer = csv.DictWriter(summary_file, SUMMARY_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
@@ -1,8 +1,12 @@
-from PyPDF2 import PdfReader as pyPdfReader
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
+import mmap
+import os
+from io import BufferedReader, BytesIO, RawIOBase
+
 import curses.ascii
 
+from parsers import profiling
+from parsers.cache import content_digest
+
 SPECIAL_CHARS_MAPPING = {
     curses.ascii.DC1: " ",
     curses.ascii.DC2: " ",
@@ -22,34 +26,267 @@ SPECIAL_CHARS_MAPPING = {
     curses.ascii.FF: "\n"
 }
 
+# clean_content in a single bytes.translate over UTF-8 encoded text. Every byte of a non-ASCII
+# character is above 127, so deleting those drops non-ASCII characters like encoding to ASCII would.
+# \x18 and \x08 show up in place of spaces in some PDFs.
+CLEAN_CONTENT_TABLE = bytes.maketrans(
+    bytes([*SPECIAL_CHARS_MAPPING, 0x18, 0x08]),
+    "".join([*SPECIAL_CHARS_MAPPING.values(), " ", " "]).encode("ascii"),
+)
+NON_ASCII_BYTES = bytes(range(128, 256))
+
+# Starts each page in cached text. Cleaning turns form feeds into newlines, so it never shows up in a page
+PAGE_SEPARATOR = "\f"
+
+
+def map_file(file):
+    """Read only mmap of an open file, None when it can't be mapped (empty files, pipes, sockets)"""
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def load_buffer(source):
+    """Contents of a PDF as a buffer both extractors can read without copying it.
+
+    Paths and real files are memory mapped, mmaps and bytes are used as they are, other buffers and
+    file-like objects are read into bytes once.
+    """
+    if isinstance(source, (mmap.mmap, bytes)):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as pdf_file:
+            return map_file(pdf_file) or pdf_file.read()
+
+    # File-like
+    mapped = map_file(source)
+    if mapped is not None:
+        return mapped
+    if getattr(source, "seekable", lambda: False)():
+        source.seek(0)
+    return source.read()
+
+
+class BufferStream(RawIOBase):
+    """Seekable, read only file over a buffer, that copies out only what is read"""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        end = min(self._position + len(b), len(self._view))
+        size = max(end - self._position, 0)
+        b[:size] = self._view[self._position : self._position + size]
+        self._position += size
+        return size
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        # Let go of the buffer, an mmap can't be closed while a view of it is held
+        self._view.release()
+        super().close()
+
 
 class PdfReader(object):
-    def __init__(self, file, *args, **kwargs):
+    """Text of a PDF, read with PyPDF2 and, for some insurers, pdfminer.
+
+    `file` is a path, the PDF's bytes, an mmap of it or a file-like object. It is loaded once and
+    the same buffer is handed to both extractors. Paths and real files are memory mapped, the map is
+    closed by ``close``, or on leaving a ``with`` block. The text already extracted stays readable,
+    extracting more pages after that raises ValueError.
+
+        with PdfReader("policy.pdf") as reader:
+            content = reader.read_file_pypdf()
+    """
+
+    def __init__(self, file, *args, cache=None, digest=None, **kwargs):
         self._input_file = file
+        self._cache = cache
+        self._buffer = None
+        # SHA-256 of the content, computed when first needed unless the caller already has it
+        self._digest = digest
+        self._page_source = None
+        # Whether every page is extracted, the pages stay readable once the reader is closed
+        self._pages_read = False
+        self._closed = False
         self.pages = []
         self._content = ""
+        self._content_pages = 0
+        # Streams handed to the extractors, closed before the buffer is
+        self._streams = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the mmap of the file, if this reader mapped it. mmaps passed in are left open."""
+        if self._page_source is not None:
+            self._page_source.close()
+            self._page_source = None
+        self._closed = True
+        for stream in self._streams:
+            stream.close()
+        self._streams = []
+        if isinstance(self._buffer, mmap.mmap) and self._buffer is not self._input_file:
+            self._buffer.close()
+        self._buffer = None
 
     @property
     def content(self):
-        if not self._content:
-            self.read_file_pypdf()
+        return self.read_file_pypdf()
+
+    @property
+    def buffer(self):
+        # Load the file once, both extractors parse the same buffer
+        if self._buffer is None:
+            self._buffer = load_buffer(self._input_file)
+        return self._buffer
+
+    @property
+    def stream(self):
+        buffer = self.buffer
+        if isinstance(buffer, bytes):
+            # BytesIO shares the bytes until written to
+            return BytesIO(buffer)
+        stream = BufferedReader(BufferStream(buffer))
+        self._streams.append(stream)
+        return stream
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            self._digest = content_digest(self.buffer)
+        return self._digest
+
+    @property
+    def extracted_content(self):
+        """Content of the pages extracted so far, without extracting any more."""
+        # Joined when asked for, rather than as pages come in. Detection searches the pages one at a
+        # time, so this is joined again only after more pages are read for the parser.
+        if self._content_pages != len(self.pages):
+            self._content = "\n" + "\n".join(self.pages)
+            self._content_pages = len(self.pages)
         return self._content
 
-    def read_file_pypdf(self):
-        reader = pyPdfReader(self._input_file)
+    def _extract_pages_pypdf(self):
+        cached = self._cache and self._cache.get(self.digest, "pypdf")
+        if cached is not None:
+            yield from cached.split(PAGE_SEPARATOR)[1:]
+            return
+
+        # Imported on first use, PyPDF2 and pdfminer take longer to import than a small batch takes to parse
+        from PyPDF2 import PdfReader as pyPdfReader
+
+        reader = pyPdfReader(self.stream)
+        pages = []
         for page in reader.pages:
-            clean_content = self.clean_content(page.extract_text())
-            self.pages.append(clean_content)
-            self._content += "\n" + clean_content
-        return self._content
+            pages.append(self.clean_content(page.extract_text()))
+            yield pages[-1]
+
+        # Only complete documents are cached
+        if self._cache:
+            self._cache.set(self.digest, "pypdf", "".join(PAGE_SEPARATOR + page for page in pages))
+
+    def iter_pages_pypdf(self):
+        """Yield the cleaned text of each page, extracting pages only as they are asked for.
+
+        Pages extracted by an earlier call are yielded again without being re-extracted.
+        """
+        page_number = 0
+        while True:
+            if page_number == len(self.pages):
+                if self._pages_read:
+                    return
+                if self._page_source is None:
+                    if self._closed:
+                        raise ValueError("Can't extract more pages, the reader is closed")
+                    self._page_source = self._extract_pages_pypdf()
+                if profiling.profiler is None:
+                    clean_content = next(self._page_source, None)
+                else:
+                    clean_content = profiling.profiler.time("extract.pypdf", next, self._page_source, None)
+                if clean_content is None:
+                    self._pages_read = True
+                    self._page_source = None
+                    return
+                self.pages.append(clean_content)
+
+            yield self.pages[page_number]
+            page_number += 1
+
+    def read_file_pypdf(self):
+        for _ in self.iter_pages_pypdf():
+            pass
+        return self.extracted_content
+
+    def read_file_pdfminer(self, page_numbers=None):
+        if profiling.profiler is not None:
+            return profiling.profiler.time("extract.pdfminer", self._read_file_pdfminer, page_numbers)
+        return self._read_file_pdfminer(page_numbers)
+
+    def _read_file_pdfminer(self, page_numbers):
+        variant = ",".join(map(str, page_numbers)) if page_numbers else ""
+        cached = self._cache and self._cache.get(self.digest, "pdfminer", variant)
+        if cached is not None:
+            return cached
+
+        # Only needed for some insurers (icici)
+        from pdfminer.high_level import extract_text
+        from pdfminer.layout import LAParams
 
-    def read_file_pdfminer(self):
         laparams = LAParams()
-        return self.clean_content(extract_text(self._input_file, laparams=laparams))
+        content = self.clean_content(extract_text(self.stream, page_numbers=page_numbers, laparams=laparams))
+        if self._cache:
+            self._cache.set(self.digest, "pdfminer", content, variant)
+        return content
+
+    def find_pages(self, pattern, following=0):
+        """Return the (zero based) numbers of the pages read by pypdf that match `pattern`.
+
+        The `following` pages after each matching page are included too. Returns None when no page
+        matches, so it can be passed straight on as `page_numbers` to read every page instead.
+        """
+        self.read_file_pypdf()
+        selected = set()
+        for page_number, page in enumerate(self.pages):
+            if pattern.search(page):
+                selected.update(range(page_number, min(page_number + following + 1, len(self.pages))))
+        return sorted(selected) or None
 
     def remove_non_ascii_2(self, content):
         # encode using ASCII encoding and drop all non-ASCII characters
         return content.encode('ascii', errors='ignore').decode().translate(SPECIAL_CHARS_MAPPING)
 
     def clean_content(self, content):
-        return self.remove_non_ascii_2(content).replace("&amp;", "&").replace("\xa0", " ").replace("\x18", " ").replace("\x08", " ")
+        # Same as remove_non_ascii_2 followed by replacing "&amp;" with "&" and \x18 and \x08 with
+        # spaces, without copying the text for every step
+        content = content.encode("utf-8", "surrogatepass")
+        content = content.translate(CLEAN_CONTENT_TABLE, NON_ASCII_BYTES).decode("ascii")
+        if "&amp;" in content:
+            content = content.replace("&amp;", "&")
+        return content
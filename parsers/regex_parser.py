@@ -1,5 +1,21 @@
+import functools
+import logging
+import re
+import time
+from collections import Counter
+
+from parsers import pattern_stats, profiling
 from parsers.base import BasePolicyParser
 
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+logger = logging.getLogger(__name__)
+
 STATE_MAPPING = {
     "AN": "Andaman and Nicobar",
     "AP": "Andhra Pradesh",
@@ -37,6 +53,99 @@ STATE_MAPPING = {
     "WB": "West Bengal",
 }
 
+# Anchors shorter than this are too common to be worth indexing
+MIN_ANCHOR_LENGTH = 3
+
+# Patterns whose anchor and budgeted equivalent are kept. Besides the patterns of the parser
+# classes, some are built per policy (ICICI Lombard's embed the RTO location), the bound keeps
+# those from piling up in long running workers.
+MAX_CACHED_PATTERNS = 4096
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_PATTERNS)
+def pattern_anchor(pattern):
+    """Return the lowercased literal text every match of `pattern` starts with, or None.
+
+    Leading zero-width assertions (^, lookbehinds, ...) are skipped, a match still has to satisfy them.
+    """
+    anchor = []
+    for op, value in sre_parse.parse(pattern.pattern, pattern.flags & ~re.UNICODE):
+        if op is sre_constants.LITERAL:
+            anchor.append(chr(value))
+        elif anchor or op not in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            break
+
+    anchor = "".join(anchor).lower()
+    return anchor if len(anchor) >= MIN_ANCHOR_LENGTH else None
+
+
+@functools.lru_cache(maxsize=None)
+def regex_module():
+    """The regex module, needed to abort patterns that exceed the pattern budget, None when not installed.
+
+    It is optional and only imported once a budget is set, it is slow to import.
+    """
+    try:
+        import regex
+    except ImportError:
+        return None
+    return regex
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_PATTERNS)
+def budgeted_pattern(pattern):
+    """Return the `regex` module equivalent of `pattern`, which can be searched with a timeout."""
+    return regex_module().compile(pattern.pattern, pattern.flags)
+
+
+_pattern_list_names = {}
+
+
+def pattern_list_names(re_class):
+    """Map the id of each pattern list of `re_class` to its attribute name, for profiling."""
+    if re_class not in _pattern_list_names:
+        _pattern_list_names[re_class] = {
+            id(getattr(re_class, name)): name for name in dir(re_class) if name.endswith("_PATTERNS")
+        }
+    return _pattern_list_names[re_class]
+
+
+class PatternTimeout(Exception):
+    pass
+
+
+# Marks a field that hasn't been extracted yet, None and "" are valid extracted values
+_NOT_EXTRACTED = object()
+
+
+def cached_field(getter):
+    """Extract a field only once per policy, later calls return the stored value.
+
+    Values are stored under the getter's qualified name, so an override calling super() doesn't
+    get its own value back from the parent's getter. When profiling, only the outermost of an
+    override and the getters it calls through super() is timed, they share a stage.
+    """
+    key = getter.__qualname__
+
+    stage = f"field.{getter.__name__}"
+
+    @functools.wraps(getter)
+    def wrapper(self):
+        value = self._fields.get(key, _NOT_EXTRACTED)
+        if value is _NOT_EXTRACTED:
+            if profiling.profiler is None or stage in self._timed_stages:
+                value = getter(self)
+            else:
+                self._timed_stages.add(stage)
+                try:
+                    value = profiling.profiler.time(stage, getter, self)
+                finally:
+                    self._timed_stages.discard(stage)
+            self._fields[key] = value
+        return value
+
+    return wrapper
+
 
 class RegexPolicyParser(BasePolicyParser):
     class RE:
@@ -104,19 +213,142 @@ class RegexPolicyParser(BasePolicyParser):
 
         BODY_TYPE_PATTERNS = []
 
-    def __init__(self, *args, **kwargs):
-        # Define internal cache
-        self._cache = {}
+    # Only try patterns at the positions their leading literal occurs in the content
+    USE_ANCHOR_INDEX = True
+
+    # Whether the adaptive mode may try the patterns of this parser in the order their hit rates
+    # suggest (see pattern_stats.PatternOrder), False where the written order is a precedence
+    REORDER_PATTERNS = True
+
+    # Names of pattern lists always tried in the written order, for precedence within a single list
+    FIXED_ORDER_PATTERNS = frozenset()
+
+    def __init__(self, *args, pattern_budget=None, **kwargs):
+        # Seconds a single pattern may spend searching the content, None for no limit. Patterns over
+        # budget are aborted (requires the regex module, the "budget" extra) and treated as not matching.
+        self.pattern_budget = pattern_budget
+        # Extracted fields, and the field stages being timed, see cached_field
+        self._fields = {}
+        self._timed_stages = set()
+        # Number of times each pattern list was run, every list should run at most once per policy
+        self.pattern_runs = Counter()
+        # Seconds spent in each pattern and the patterns aborted, only kept with a pattern_budget
+        self.pattern_timings = Counter()
+        self.pattern_timeouts = []
+        # Positions of each anchor in the content, see search()
+        self._anchor_index = {}
+        self._complete_anchors = set()
+        self._lowered_content = None
         return super().__init__(*args, **kwargs)
 
-    def extract_information(self, pattern_list, cache_key=None, debug=False):
-        if cache_key and self._cache.setdefault(cache_key):
-            return self._cache[cache_key]
+    def _anchor_positions(self, anchor):
+        # Positions are found as they are asked for, most patterns match at one of the first few
+        positions = self._anchor_index.setdefault(anchor, [])
+        index = 0
+        while True:
+            if index == len(positions):
+                if anchor in self._complete_anchors:
+                    return
+                pos = self._lowered_content.find(anchor, positions[-1] + 1 if positions else 0)
+                if pos == -1:
+                    self._complete_anchors.add(anchor)
+                    return
+                positions.append(pos)
+
+            yield positions[index]
+            index += 1
+
+    def search(self, pattern):
+        """Equivalent of `pattern.search(self.content)`.
+
+        A match must start with the pattern's anchor, so instead of scanning the whole content, the
+        pattern is only tried at the positions its anchor was found at, in order.
+        """
+        if self.pattern_budget is None:
+            return self._search(pattern)
+
+        start = time.perf_counter()
+        try:
+            return self._search(pattern, deadline=start + self.pattern_budget)
+        except PatternTimeout:
+            self.pattern_timeouts.append(pattern)
+            logger.warning("Aborted pattern after %ss: %s", self.pattern_budget, pattern.pattern)
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            self.pattern_timings[pattern] += elapsed
+            if regex_module() is None and elapsed > self.pattern_budget and pattern not in self.pattern_timeouts:
+                # Without the regex module slow patterns can only be reported, not aborted
+                self.pattern_timeouts.append(pattern)
+                logger.warning("Pattern exceeded %ss (%.2fs): %s", self.pattern_budget, elapsed, pattern.pattern)
+
+    def _run(self, pattern, method, pos, deadline):
+        if deadline is None or regex_module() is None:
+            return getattr(pattern, method)(self.content, pos)
+
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise PatternTimeout()
+        try:
+            return getattr(budgeted_pattern(pattern), method)(self.content, pos, timeout=remaining)
+        except TimeoutError:
+            raise PatternTimeout()
+
+    def _search(self, pattern, deadline=None):
+        anchor = pattern_anchor(pattern) if self.USE_ANCHOR_INDEX else None
+        if anchor is None:
+            return self._run(pattern, "search", 0, deadline)
+
+        if self._lowered_content is None:
+            self._lowered_content = self.content.lower()
+            if len(self._lowered_content) != len(self.content):
+                # Lowercasing changed some offsets, the index would be wrong
+                self.USE_ANCHOR_INDEX = False
+                return self._run(pattern, "search", 0, deadline)
+
+        for pos in self._anchor_positions(anchor):
+            match = self._run(pattern, "match", pos, deadline)
+            if match:
+                return match
+        return None
+
+    def contains(self, regex, flags=0):
+        """Whether `regex` matches anywhere in the content, using the anchor index."""
+        return self.search(re.compile(regex, flags)) is not None
+
+    def extract_information(self, pattern_list, debug=False):
+        if pattern_list:
+            self.pattern_runs[tuple(pattern_list)] += 1
 
         value = ""
         match = None
-        for pattern in pattern_list:
-            match = pattern.search(self.content)
+        profiler, stats, order = profiling.profiler, pattern_stats.stats, pattern_stats.order
+        indexes = range(len(pattern_list))
+        if profiler is not None or stats is not None or order is not None:
+            name = pattern_list_names(self.RE).get(id(pattern_list), "OTHER_PATTERNS")
+            parser_name = type(self).__name__
+            if name == "OTHER_PATTERNS":
+                # Lists built per policy (ICICI embeds the RTO location) would add new patterns to
+                # the stats file on every run, and none of them are ever reordered
+                stats = None
+            if order is not None and self._reorderable(name):
+                indexes = order.indexes(parser_name, name, pattern_list)
+
+        for index in indexes:
+            pattern = pattern_list[index]
+            if profiler is None and stats is None:
+                match = self.search(pattern)
+            else:
+                start = time.perf_counter()
+                try:
+                    match = self.search(pattern)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    if profiler is not None:
+                        # Indexes are those of the written order, whatever order the patterns ran in
+                        profiler.add(f"pattern.{name}[{index}]", elapsed)
+                if stats is not None:
+                    stats.add(parser_name, name, pattern, bool(match and match.group(1).strip()), elapsed)
             if match:
                 found_match = match.group(1).strip()
                 if found_match:
@@ -129,151 +361,177 @@ class RegexPolicyParser(BasePolicyParser):
                 if debug:
                     print(f"No Match. {pattern.pattern}")
 
-        if cache_key:
-            self._cache[cache_key] = value
         return value
 
+    def _reorderable(self, name):
+        # Lists passed in directly rather than taken from RE have no stats to order them by
+        return self.REORDER_PATTERNS and name != "OTHER_PATTERNS" and name not in self.FIXED_ORDER_PATTERNS
+
+    @cached_field
     def get_customer_name(self):
         return self.extract_information(self.RE.CUST_NAME_PATTERNS)
 
+    @cached_field
     def get_address(self):
         return self.extract_information(self.RE.ADDRESS_PATTERNS)
 
+    @cached_field
     def get_city(self):
         return self.extract_information(self.RE.CITY_PATTERNS)
 
+    @cached_field
     def get_state(self):
-        if not self._cache.setdefault("state", ""):
-            # Extract from policy content
-            self._cache["state"] = self.extract_information(self.RE.STATE_PATTERNS)
+        # Extract from policy content
+        state = self.extract_information(self.RE.STATE_PATTERNS)
 
-        if not self._cache["state"]:
+        if not state:
             # Extract from registration number
             reg_state_chars = self.get_reg_no()[0:2]
-            self._cache["state"] = STATE_MAPPING.get(reg_state_chars, "")
-        return self._cache["state"]
+            state = STATE_MAPPING.get(reg_state_chars, "")
+        return state
 
+    @cached_field
     def get_mobile_no(self):
-        return self.extract_information(self.RE.MOBILE_PATTERNS, "mobile_number")
+        return self.extract_information(self.RE.MOBILE_PATTERNS)
 
+    @cached_field
     def get_reg_no(self):
-        return self.extract_information(self.RE.REG_NO_PATTERNS, "registration_number")
+        return self.extract_information(self.RE.REG_NO_PATTERNS)
 
+    @cached_field
     def get_make(self):
-        return self.extract_information(self.RE.MAKE_PATTERNS, "make")
+        return self.extract_information(self.RE.MAKE_PATTERNS)
 
+    @cached_field
     def get_model(self):
         return self.extract_information(self.RE.MODEL_PATTERNS)
 
+    @cached_field
     def get_variant(self):
         return self.extract_information(self.RE.VARIANT_PATTERNS)
 
+    @cached_field
     def get_year_of_manufacture(self):
-        return self.extract_information(self.RE.YOM_PATTERNS, "year_of_manufacture")
+        return self.extract_information(self.RE.YOM_PATTERNS)
 
+    @cached_field
     def get_ncb(self):
         ncb = self.extract_information(self.RE.NCB_PATTERNS)
         if ncb:
             return str(int(float(ncb)))
 
+    @cached_field
     def get_start_date(self):
         return self.extract_information(self.RE.START_DATE_PATTERNS)
 
+    @cached_field
     def get_end_date(self):
         return self.extract_information(self.RE.END_DATE_PATTERNS)
 
+    @cached_field
     def get_policy_type(self):
         return self.extract_information(self.RE.POLICY_TYPE_PATTERNS)
 
+    @cached_field
     def get_policy_number(self):
-        return self.extract_information(self.RE.POLICY_NUM_PATTERNS, "policy_number")
+        return self.extract_information(self.RE.POLICY_NUM_PATTERNS)
 
+    @cached_field
     def get_sum_insured(self):
         sum_insured = self.extract_information(self.RE.SI_PATTERNS)
         if sum_insured:
             sum_insured = sum_insured.replace(",", "")
             return str(int(float(sum_insured)))
 
+    @cached_field
     def get_basic_od_premium(self):
         value = self.extract_information(self.RE.BASIC_OD_PREMIUM_PATTERNS)
         if value:
             value = value.replace(",", "")
             return str(int(float(value)))
 
+    @cached_field
     def get_od_premium(self):
         value = self.extract_information(self.RE.OD_PREMIUM_PATTERNS)
         if value:
             value = value.replace(",", "")
             return str(int(float(value)))
 
+    @cached_field
     def get_tp_premium(self):
         value = self.extract_information(self.RE.TP_PREMIUM_PATTERNS)
         if value:
             value = value.replace(",", "")
             return str(int(float(value)))
 
+    @cached_field
     def get_taxes(self):
-        if not self._cache.setdefault("taxes", ""):
-            value = self.extract_information(self.RE.TAXES_PATTERNS)
-            if value:
-                value = value.replace(",", "")
-                self._cache["taxes"] = str(int(float(value)))
-        return self._cache["taxes"]
+        value = self.extract_information(self.RE.TAXES_PATTERNS)
+        if value:
+            value = value.replace(",", "")
+            return str(int(float(value)))
+        return ""
 
+    @cached_field
     def get_tax_rate(self):
         value = self.extract_information(self.RE.TAX_RATE_PATTERNS)
         return value or "18"
 
+    @cached_field
     def get_net_premium(self):
-        if not self._cache.setdefault("net_premium", ""):
-            value = self.extract_information(self.RE.NET_PREMIUM_PATTERNS)
-            if value:
-                value = value.replace(",", "")
-                self._cache["net_premium"] = str(int(float(value)))
-        return self._cache["net_premium"]
+        value = self.extract_information(self.RE.NET_PREMIUM_PATTERNS)
+        if value:
+            value = value.replace(",", "")
+            return str(int(float(value)))
+        return ""
 
+    @cached_field
     def get_total_premium(self):
-        if not self._cache.setdefault("total_premium", ""):
-            value = self.extract_information(self.RE.TOTAL_PREMIUM_PATTERNS)
-            if value:
-                value = value.replace(",", "")
-                self._cache["total_premium"] = str(int(float(value)))
-        return self._cache["total_premium"]
+        value = self.extract_information(self.RE.TOTAL_PREMIUM_PATTERNS)
+        if value:
+            value = value.replace(",", "")
+            return str(int(float(value)))
+        return ""
 
+    @cached_field
     def get_posp_identifier(self):
-        return self.extract_information(self.RE.POS_IDENTIFIER_PATTERNS, "pos_identifier")
+        return self.extract_information(self.RE.POS_IDENTIFIER_PATTERNS)
 
+    @cached_field
     def get_receipt_number(self):
         return self.extract_information(self.RE.RECEIPT_NUMBER_PATTERNS)
 
+    @cached_field
     def get_receipt_date(self):
-        return self.extract_information(self.RE.RECEIPT_DATE_PATTERNS, "receipt_date")
+        return self.extract_information(self.RE.RECEIPT_DATE_PATTERNS)
 
+    @cached_field
     def get_policy_issue_date(self):
         return self.extract_information(self.RE.POLICY_ISSUE_DATE_PATTERNS)
 
+    @cached_field
     def get_payment_mode(self):
         return self.extract_information(self.RE.PAYMENT_MODE_PATTERNS)
 
+    @cached_field
     def get_payment_amount(self):
         return self.extract_information(self.RE.PAYMENT_AMOUNT_PATTERNS)
 
+    @cached_field
     def get_insurer_branch(self):
         return self.extract_information(self.RE.INSURER_BRANCH_PATTERNS)
 
+    @cached_field
     def get_customer_type(self):
-        if self._cache.get("customer_type", None):
-            return self._cache["customer_type"]
-
-        value = self.extract_information(self.RE.CUSTOMER_TYPE_PATTERNS, "customer_type")
+        value = self.extract_information(self.RE.CUSTOMER_TYPE_PATTERNS)
         if value:
             return value
 
-        self._cache["customer_type"] = "individual"
         customer_name = self.get_customer_name().lower()
         if "m/s" in customer_name or "llp" in customer_name or "ltd" in customer_name:
-            self._cache["customer_type"] = "corporate"
-        return self._cache["customer_type"]
+            return "corporate"
+        return "individual"
 
+    @cached_field
     def get_body_type(self):
         return self.extract_information(self.RE.BODY_TYPE_PATTERNS)
@@ -1,10 +1,28 @@
 import re
 
-from parsers.regex_parser import RegexPolicyParser
+from parsers.regex_parser import RegexPolicyParser, cached_field
 from parsers.base import Insurers
 
 
 class SbiPolicyParser(RegexPolicyParser):
+    # Lists where a later pattern also matches what an earlier one does, with another value, or
+    # where the earlier pattern reads the preferred section of the document
+    FIXED_ORDER_PATTERNS = frozenset(
+        {
+            "CUST_NAME_PATTERNS",
+            "ADDRESS_PATTERNS",
+            "CITY_PATTERNS",
+            "STATE_PATTERNS",
+            "REG_NO_PATTERNS",
+            "MAKE_PATTERNS",
+            "MODEL_PATTERNS",
+            "VARIANT_PATTERNS",
+            "POLICY_NUM_PATTERNS",
+            "SI_PATTERNS",
+            "TAXES_PATTERNS",
+        }
+    )
+
     class RE(RegexPolicyParser.RE):
         CUST_NAME_PATTERNS = [
             re.compile(r"Insured Name\s*:\s*([\w\.\d \t]+)"),  # Policy Details Table
@@ -200,56 +218,60 @@ class SbiPolicyParser(RegexPolicyParser):
     def get_insurer(self):
         return Insurers.SBI
 
+    @cached_field
     def get_policy_type(self):
         # Two Wheeler
-        if re.search(r"Two[\s\-]*Wheeler\s*Insurance\s*Policy\s*-\s*Package", self.content, flags=re.I | re.M):
+        if self.contains(r"Two[\s\-]*Wheeler\s*Insurance\s*Policy\s*-\s*Package", flags=re.I | re.M):
             return "Motor Two Wheeler Policy"
-        elif re.search(r"BUNDLED\s*TWO[- ]WHEELER\s*INSURANCE\s*POLICY", self.content, flags=re.I | re.M):
+        elif self.contains(r"BUNDLED\s*TWO[- ]WHEELER\s*INSURANCE\s*POLICY", flags=re.I | re.M):
             return "Motor Two Wheeler Policy"
-        elif re.search(r"Stand-Alone Motor\s*(own)?\s*Damage Cover for Two[\s\-]*Wheeler", self.content, flags=re.I | re.M):
+        elif self.contains(r"Stand-Alone Motor\s*(own)?\s*Damage Cover for Two[\s\-]*Wheeler", flags=re.I | re.M):
             # return "Motor Two Wheeler Standalone OD Policy"
             return "Motor Two Wheeler Policy"
-        elif re.search(r"TWO[\s\-]*WHEELER\s*LIABILITY\s*ONLY\s*POLICY", self.content, flags=re.I | re.M):
+        elif self.contains(r"TWO[\s\-]*WHEELER\s*LIABILITY\s*ONLY\s*POLICY", flags=re.I | re.M):
             # return "Motor Two Wheeler Liability Policy"
             return "Motor Two Wheeler Policy"
-        elif re.search(r"Act\s*Only\s*Insurance\s*Policy", self.content, flags=re.M) and "POPM2W" in self.get_policy_number():
+        elif self.contains(r"Act\s*Only\s*Insurance\s*Policy", flags=re.M) and "POPM2W" in self.get_policy_number():
             # return "Motor Two Wheeler Liability Policy"
             return "Motor Two Wheeler Policy"
 
         # Private Car
-        elif re.search(r"Private\s*Car\s*Insurance\s*Policy\s*-\s*Package", self.content, flags=re.I | re.M):
+        elif self.contains(r"Private\s*Car\s*Insurance\s*Policy\s*-\s*Package", flags=re.I | re.M):
             return "Motor Private Car Package Policy"
-        elif re.search(r"Act\s*Only\s*Insurance\s*Policy", self.content, flags=re.I | re.M) and "POPMCAR" in self.get_policy_number():
+        elif self.contains(r"Act\s*Only\s*Insurance\s*Policy", flags=re.I | re.M) and "POPMCAR" in self.get_policy_number():
             return "Motor Liability Policy"
-        elif re.search(r"Stand-Alone Motor own Damage Cover for Private Car", self.content, flags=re.I | re.M):
+        elif self.contains(r"Stand-Alone Motor own Damage Cover for Private Car", flags=re.I | re.M):
             # return "Motor Private Car Standalone OD Policy"
             return "Motor Standalone OD Policy"
-        elif re.search(r"PRIVATE\s*CAR\s*PACKAGE\s*POLICY", self.content, flags=re.I | re.M):
+        elif self.contains(r"PRIVATE\s*CAR\s*PACKAGE\s*POLICY", flags=re.I | re.M):
             return "Motor Private Car Package Policy"
-        elif re.search(r"Private\s*Motor\s*4\s*wheeler", self.content, flags=re.I | re.M):
+        elif self.contains(r"Private\s*Motor\s*4\s*wheeler", flags=re.I | re.M):
             return "Motor Private Car Package Policy"
 
         # GCV
-        elif re.search(r"COMMERCIAL GOODS CARRYING", self.content, flags=re.I | re.M):
+        elif self.contains(r"COMMERCIAL GOODS CARRYING", flags=re.I | re.M):
             return "Motor GCV Policy"
-        elif re.search(r"Commercial Motor Miscellaneous Vehicles", self.content, flags=re.I | re.M):
+        elif self.contains(r"Commercial Motor Miscellaneous Vehicles", flags=re.I | re.M):
             return "Motor Misc Policy"
 
         # PCV
-        elif re.search(r"Commercial Motor Passenger Carrying", self.content, flags=re.I | re.M):
+        elif self.contains(r"Commercial Motor Passenger Carrying", flags=re.I | re.M):
             return "Motor PCV Policy"
 
+    @cached_field
     def get_net_premium(self):
         try:
             return str(int(self.get_total_premium()) - int(self.get_taxes()))
         except Exception:
             return ""
 
+    @cached_field
     def get_receipt_number(self):
         value = super().get_receipt_number()
         if value and value.strip().lower() in ("reference", "receipt"):
             return ""
         return value
 
+    @cached_field
     def get_policy_issue_date(self):
         return self.get_receipt_date()
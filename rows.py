@@ -0,0 +1,63 @@
+class Row(object):
+    """Values of a row kept as a list in the order of a fixed list of headers.
+
+    Subclasses set ``HEADERS`` and the ``DEFAULTS`` of the columns that never change. Every row
+    starts as a copy of the template built from them once, so only the columns that differ are
+    filled per row, and writers with the same headers take the values as they are. Rows can still
+    be read and written by header like a dict.
+    """
+
+    __slots__ = ("values",)
+
+    HEADERS = ()
+    DEFAULTS = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.HEADERS = tuple(cls.HEADERS)
+        cls.INDEX = {header: i for i, header in enumerate(cls.HEADERS)}
+        cls.TEMPLATE = tuple(cls.DEFAULTS.get(header, "") for header in cls.HEADERS)
+
+    def __init__(self, values=None):
+        self.values = list(self.TEMPLATE if values is None else values)
+
+    @classmethod
+    def from_dict(cls, fields):
+        row = cls()
+        values, index = row.values, cls.INDEX
+        for header, value in fields.items():
+            values[index[header]] = value
+        return row
+
+    def __getitem__(self, header):
+        return self.values[self.INDEX[header]]
+
+    def __setitem__(self, header, value):
+        self.values[self.INDEX[header]] = value
+
+    def __contains__(self, header):
+        return header in self.INDEX
+
+    def __iter__(self):
+        return iter(self.HEADERS)
+
+    def __len__(self):
+        return len(self.HEADERS)
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self.HEADERS == other.HEADERS and self.values == other.values
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+    def get(self, header, default=None):
+        i = self.INDEX.get(header)
+        return default if i is None else self.values[i]
+
+    def keys(self):
+        return self.HEADERS
+
+    def items(self):
+        return zip(self.HEADERS, self.values)
@@ -0,0 +1,247 @@
+#!/bin/env python3
+"""HTTP service parsing policies sent to it, for intake services that already hold the PDF.
+
+    python service.py --branches branches.csv --port 8080 --workers 4
+    curl --data-binary @policy.pdf "http://localhost:8080/parse?name=policy.pdf"
+
+POST /parse takes the PDF as the request body and answers with the SAIBA row as JSON, or with the
+error report row (422) when the policy can't be parsed. `name` names the file in the row and
+`date` (mm/dd/yyyy) is the processing date, today by default. GET /health reports the load.
+
+Policies are parsed in a pool of worker processes that are started, with the branch master
+loaded, before the first request. At most --max-in-flight requests are parsed or queued at a time,
+requests beyond that are turned away with 503 so callers can back off.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from http import HTTPStatus
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+from parse_policy import WORKER_GRACE_SECONDS, Masters, PolicyParser, kill_pool, parse_in_worker
+
+# Largest request body accepted, in bytes
+DEFAULT_MAX_BODY = 50 * 1024 * 1024
+
+# Seconds a client gets to send its request
+READ_TIMEOUT = 60
+
+
+# Seconds callers turned away for load are asked to wait before retrying
+RETRY_AFTER = 1
+
+
+def _warm_up():
+    # Long enough that every worker takes one, so all of them are initialised before requests arrive
+    time.sleep(0.1)
+    return os.getpid()
+
+
+def _parse_upload(data, name, processing_date):
+    """Parse a PDF held in memory in a worker, returns ``(row, error)`` as dicts"""
+    upload = BytesIO(data)
+    upload.name = name
+    row, error = parse_in_worker(upload, processing_date)
+    return (dict(row) if row is not None else None), error
+
+
+class HttpError(Exception):
+    def __init__(self, status, message=None, headers=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ParseService(object):
+    """Parses policies in a warm process pool, with a bound on the requests being worked on."""
+
+    def __init__(self, parser, workers=1, max_in_flight=None, timeout=None, max_body=DEFAULT_MAX_BODY):
+        self.parser = parser
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * 2
+        # Seconds a single policy may take, enforced in the worker with some grace on top here
+        self.timeout = timeout
+        self.max_body = max_body
+        self.in_flight = 0
+        self.pool = None
+        # Warm-up of a restarted pool, running in the background
+        self._warming = None
+
+    async def start(self):
+        """Start the worker pool, returns once every worker is initialised"""
+        self.pool = self.parser.new_pool(self.workers)
+        await self._start_workers(self.pool)
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _start_workers(self, pool):
+        # Start every worker now rather than on the first requests
+        futures = [asyncio.wrap_future(pool.submit(_warm_up)) for _ in range(self.workers)]
+        pids = set(await asyncio.gather(*futures))
+        print(f"Started {len(pids)} worker(s)")
+
+    async def _restart_workers(self, pool):
+        try:
+            await self._start_workers(pool)
+        except BrokenProcessPool:
+            # Already broken again, the request that finds out restarts it
+            pass
+
+    def _restart_pool(self, pool):
+        """Replace pool, the one a failed request ran in, unless another failed request already has.
+
+        Killing a pool fails every other request in it, only the first of them starts a new one.
+        """
+        if self.pool is not pool:
+            return
+        kill_pool(pool)
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = self.parser.new_pool(self.workers)
+        # Requests arriving meanwhile queue in the new pool until its workers are up
+        self._warming = asyncio.ensure_future(self._restart_workers(self.pool))
+
+    async def parse(self, data, name, processing_date):
+        if self.in_flight >= self.max_in_flight:
+            raise HttpError(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "Too many policies in flight, retry later",
+                {"Retry-After": str(RETRY_AFTER)},
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            pool = self.pool
+            future = loop.run_in_executor(pool, _parse_upload, data, name, processing_date)
+            deadline = self.timeout + WORKER_GRACE_SECONDS if self.timeout else None
+            return await asyncio.wait_for(future, deadline)
+        except asyncio.TimeoutError:
+            # The in-worker timeout didn't fire, the worker is stuck and has to go
+            self._restart_pool(pool)
+            raise HttpError(HTTPStatus.GATEWAY_TIMEOUT, "Timed out")
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise HttpError(HTTPStatus.INTERNAL_SERVER_ERROR, "Worker process crashed")
+        finally:
+            self.in_flight -= 1
+
+    async def handle(self, reader, writer):
+        headers = {}
+        try:
+            status, body = await self._respond(reader)
+        except HttpError as e:
+            status, body, headers = e.status, {"error": str(e)}, e.headers
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+
+        payload = json.dumps(body).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(payload)),
+            "Connection": "close",
+            **headers,
+        }
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        head += "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+        writer.write(head.encode() + b"\r\n" + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _respond(self, reader):
+        request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        try:
+            method, target, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST)
+
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok", "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+        if url.path != "/parse":
+            raise HttpError(HTTPStatus.NOT_FOUND)
+        if method != "POST":
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            raise HttpError(HTTPStatus.LENGTH_REQUIRED)
+        if length > self.max_body:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        data = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT)
+
+        processing_date = query.get("date") or date.today().strftime("%m/%d/%Y")
+        row, error = await self.parse(data, query.get("name", "upload.pdf"), processing_date)
+        if error is not None:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, error
+        return HTTPStatus.OK, row
+
+
+async def serve(service, host=None, port=None, socket_path=None):
+    await service.start()
+    if socket_path:
+        server = await asyncio.start_unix_server(service.handle, path=socket_path)
+        print(f"Listening on {socket_path}")
+    else:
+        server = await asyncio.start_server(service.handle, host=host, port=port)
+        print(f"Listening on {host or '*'}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve policy parsing over HTTP")
+    arg_parser.add_argument("--branches", "-b", dest="branch_master", type=str, help="Branch Master", required=True)
+    arg_parser.add_argument("--host", type=str, default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--socket", dest="socket_path", type=str, help="Listen on a Unix socket instead")
+    arg_parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    arg_parser.add_argument(
+        "--max-in-flight",
+        dest="max_in_flight",
+        type=int,
+        help="Requests parsed or queued at a time before new ones get 503, twice the workers by default",
+    )
+    arg_parser.add_argument("--timeout", type=float, default=60, help="Seconds a single policy may take")
+    arg_parser.add_argument(
+        "--max-body", dest="max_body", type=int, default=DEFAULT_MAX_BODY, help="Largest PDF accepted, in bytes"
+    )
+    args = arg_parser.parse_args()
+
+    print("Reading Branch Master...")
+    Masters.read_branch_master(args.branch_master)
+
+    parser = PolicyParser(date=date.today().strftime("%m/%d/%Y"), files=(), timeout=args.timeout)
+    service = ParseService(parser, args.workers, args.max_in_flight, args.timeout, args.max_body)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
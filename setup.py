@@ -10,10 +10,14 @@ setup(
         "dateparser",
         "pdfminer.six",
         "thefuzz",
-        "python-Levenshtein",
+        "rapidfuzz",
         "openpyxl",
         "lxml",
         "PyPDF2",
         "defusedxml",
     ],
+    extras_require={
+        # Aborting patterns over --pattern-budget
+        "budget": ["regex"],
+    },
 )
@@ -0,0 +1,76 @@
+import os
+
+from parsers import cache as cache_module
+from parsers import get_policy_parser
+from parsers.cache import ExtractionCache
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "pdf", "2W.pdf")
+
+
+def entry_sizes(cache):
+    return sum(entry.stat().st_size for entry in cache._entries())
+
+
+def test_get_returns_what_set_stored(tmp_path):
+    cache = ExtractionCache(str(tmp_path), 1024)
+    cache.set("digest", "pypdf", "text")
+    assert cache.get("digest", "pypdf") == "text"
+    assert cache.get("digest", "pdfminer") is None
+    assert cache.get("digest", "pypdf", "0,1") is None
+
+
+def test_size_counts_replaced_entries_once(tmp_path):
+    cache = ExtractionCache(str(tmp_path), 1024 * 1024)
+    cache.set("a", "pypdf", "x" * 100)
+    cache.set("b", "pypdf", "x" * 200)
+    cache.set("a", "pypdf", "x" * 50)
+    assert cache._size == entry_sizes(cache) == 250
+
+
+def test_eviction_removes_least_recently_used_first(tmp_path):
+    cache = ExtractionCache(str(tmp_path), 1000)
+    for age, digest in enumerate(["old", "middle", "new"]):
+        cache.set(digest, "pypdf", "x" * 300)
+        os.utime(cache._path(digest, "pypdf", ""), (age, age))
+    # Reading an entry makes it the most recently used
+    cache.get("old", "pypdf")
+
+    cache.set("newest", "pypdf", "x" * 300)
+    assert cache._size == entry_sizes(cache) <= 900
+    assert cache.get("middle", "pypdf") is None
+    assert cache.get("old", "pypdf") is not None
+    assert cache.get("newest", "pypdf") is not None
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ExtractionCache(str(tmp_path), 1024)
+    cache.set("digest", "pypdf", "text")
+    with open(cache._path("digest", "pypdf", ""), "wb") as entry:
+        entry.write(b"\xff\xfe not utf-8")
+    assert cache.get("digest", "pypdf") is None
+
+
+def test_unusable_directory_leaves_text_uncached(tmp_path):
+    # A file where the cache directory should be, like a read-only or missing cache home
+    blocker = tmp_path / "cache"
+    blocker.write_text("")
+    cache = ExtractionCache(str(blocker / "pdf-parser"), 1024)
+    cache.set("digest", "pypdf", "text")
+    assert cache.get("digest", "pypdf") is None
+
+
+def test_failed_write_removes_temporary_file(tmp_path, monkeypatch):
+    def full_disk(source, destination):
+        raise OSError(28, "No space left on device")
+
+    cache = ExtractionCache(str(tmp_path), 1024)
+    monkeypatch.setattr(cache_module.os, "replace", full_disk)
+    cache.set("digest", "pypdf", "text")
+    assert [name for _, _, names in os.walk(tmp_path) for name in names] == []
+
+
+def test_policy_parses_without_a_usable_cache(tmp_path):
+    blocker = tmp_path / "cache"
+    blocker.write_text("")
+    policy = get_policy_parser(SAMPLE, cache=ExtractionCache(str(blocker / "pdf-parser")))
+    assert policy.get_policy_number()
@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks.bench_dates import GOLDEN
+from dates import APPLICABLE_DATE_FORMATS, DateNormalizer
+
+
+@pytest.mark.parametrize("text, expected", [(text, expected) for text, expected, _ in GOLDEN])
+def test_golden_dates(text, expected):
+    normalizer = DateNormalizer(APPLICABLE_DATE_FORMATS)
+    if expected is None:
+        with pytest.raises(ValueError):
+            normalizer.format(text)
+    else:
+        assert normalizer.format(text) == expected
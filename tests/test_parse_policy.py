@@ -0,0 +1,161 @@
+import csv
+import os
+import shutil
+import time
+from types import SimpleNamespace
+
+import parse_policy
+from parse_policy import PolicyParser, pdf_to_csv
+
+from benchmarks.bench_samples import GOLDEN_DIR, PROCESSING_DATE
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "pdf")
+
+
+def run_args(tmp_path, output="output.csv", **options):
+    """Arguments of a parse_policy run writing CSV into tmp_path, as the command line would give them"""
+    args = dict(
+        input_files=None,
+        input_dir=None,
+        text_dir=None,
+        output_file=str(tmp_path / output),
+        error_file=str(tmp_path / f"errors-{output}"),
+        branch_master=os.path.join(GOLDEN_DIR, "branches.csv"),
+        processing_date=PROCESSING_DATE,
+        generate_txt_file=None,
+        output_format=None,
+        workers=1,
+        timeout=None,
+        chunk_size=2,
+        no_cache=True,
+        cache_dir=None,
+        cache_size=1,
+        pattern_budget=None,
+        profile=None,
+        date_fallback=False,
+        journal=str(tmp_path / "journal"),
+        resume=False,
+        incremental=False,
+        policy_index=None,
+        pattern_stats_path=None,
+        adaptive_patterns=False,
+    )
+    args.update(options)
+    return SimpleNamespace(**args)
+
+
+def read_csv(path):
+    with open(path, newline="") as rows:
+        return list(csv.DictReader(rows))
+
+
+def intake(tmp_path, *names):
+    """A directory of copies of the named samples"""
+    directory = tmp_path / "intake"
+    directory.mkdir(exist_ok=True)
+    for name in names:
+        shutil.copy(os.path.join(SAMPLES, name), directory / name)
+    return directory
+
+
+def test_resume_and_incremental_are_exclusive(tmp_path):
+    args = run_args(tmp_path, input_dir=str(intake(tmp_path, "2W.pdf")), resume=True, incremental=True)
+    assert pdf_to_csv(args) == 1
+
+
+def test_incremental_retries_duplicate_once_original_is_gone(tmp_path):
+    directory = intake(tmp_path, "2W.pdf")
+    shutil.copy(directory / "2W.pdf", directory / "2W-copy.pdf")
+
+    def run(output):
+        result = pdf_to_csv(run_args(tmp_path, output, input_dir=str(directory), incremental=True))
+        return result, read_csv(tmp_path / f"errors-{output}")
+
+    result, errors = run("first.csv")
+    assert (result["success"], result["error"], result["skipped"]) == (1, 1, 0)
+    assert [error["reason"] for error in errors] == ["Duplicate file"]
+    duplicate = errors[0]["file"]
+
+    # The original is unchanged and skipped, the copy is still a duplicate of it
+    result, errors = run("second.csv")
+    assert (result["input"], result["success"], result["error"], result["skipped"]) == (2, 0, 1, 1)
+    assert [error["file"] for error in errors] == [duplicate]
+
+    os.remove(directory / errors[0]["remarks"].removeprefix("Same as "))
+    result, errors = run("third.csv")
+    assert (result["input"], result["success"], result["error"], result["skipped"]) == (1, 1, 0, 0)
+    assert errors == []
+    assert len(read_csv(tmp_path / "third.csv")) == 1
+
+
+def test_resumed_parallel_run_matches_uninterrupted_run(tmp_path):
+    samples = sorted(os.path.join(SAMPLES, name) for name in os.listdir(SAMPLES))
+    pdf_to_csv(run_args(tmp_path, "full.csv", input_files=samples, workers=2, journal=str(tmp_path / "full")))
+
+    # An interrupted run journals the files parsed before it stopped, resuming parses the rest
+    pdf_to_csv(run_args(tmp_path, "interrupted.csv", input_files=samples[:3], workers=2))
+    result = pdf_to_csv(run_args(tmp_path, "resumed.csv", input_files=samples, workers=2, resume=True))
+
+    assert (result["input"], result["skipped"]) == (len(samples), 3)
+    rows = read_csv(tmp_path / "resumed.csv")
+    assert [row["Sno"] for row in rows] == [str(sno) for sno in range(1, len(rows) + 1)]
+    assert rows == read_csv(tmp_path / "full.csv")
+    assert read_csv(tmp_path / "errors-resumed.csv") == read_csv(tmp_path / "errors-full.csv")
+
+
+def test_policy_index_reports_reissued_copy_but_not_moved_file(tmp_path):
+    index = str(tmp_path / "policies")
+    directory = intake(tmp_path, "2W.pdf")
+
+    def run(output):
+        pdf_to_csv(run_args(tmp_path, output, input_dir=str(directory), policy_index=index))
+        return read_csv(tmp_path / output), read_csv(tmp_path / f"errors-{output}")
+
+    rows, errors = run("first.csv")
+    assert (len(rows), errors) == (1, [])
+
+    # Moved and renamed, the same file parses again
+    (tmp_path / "moved").mkdir()
+    os.rename(directory / "2W.pdf", tmp_path / "moved" / "renamed.pdf")
+    directory = tmp_path / "moved"
+    rows, errors = run("moved.csv")
+    assert (len(rows), errors) == (1, [])
+
+    # A re-issued copy with other bytes has the policy of a file already parsed
+    with open(directory / "renamed.pdf", "rb") as policy, open(directory / "reissued.pdf", "wb") as reissued:
+        reissued.write(policy.read() + b"\n%reissued\n")
+    os.remove(directory / "renamed.pdf")
+    rows, errors = run("reissued.csv")
+    assert rows == []
+    assert [(error["file"], error["reason"]) for error in errors] == [("reissued.pdf", "Duplicate policy")]
+
+
+def test_worker_crash_and_hang_only_fail_their_own_files(tmp_path, monkeypatch):
+    parse_file = PolicyParser.parse_file
+    main_process = os.getpid()
+
+    def parse_file_or_fail(self, input_file, digest=None):
+        """Crashes or hangs the worker on the files named for it"""
+        name = os.path.basename(input_file)
+        if os.getpid() != main_process and name.startswith("crash"):
+            os._exit(1)
+        if os.getpid() != main_process and name.startswith("hang"):
+            time.sleep(60)
+        return parse_file(self, input_file, digest)
+
+    # Workers are forked with the patched parser
+    monkeypatch.setattr(PolicyParser, "parse_file", parse_file_or_fail)
+    monkeypatch.setattr(parse_policy, "WORKER_GRACE_SECONDS", 0)
+    directory = intake(tmp_path, "2W.pdf", "4W.pdf", "GCV.pdf")
+    # Other bytes than the originals, or they would be skipped as duplicates
+    for original, name in [("2W.pdf", "crash.pdf"), ("4W.pdf", "hang.pdf")]:
+        (directory / name).write_bytes((directory / original).read_bytes() + b"\n%copy\n")
+
+    result = pdf_to_csv(run_args(tmp_path, input_dir=str(directory), workers=2, timeout=5, chunk_size=1))
+    assert (result["success"], result["error"]) == (3, 2)
+    assert sorted(row["file"] for row in read_csv(tmp_path / "output.csv")) == ["2W.pdf", "4W.pdf", "GCV.pdf"]
+    errors = {os.path.basename(error["file"]): error["reason"] for error in read_csv(tmp_path / "errors-output.csv")}
+    assert errors == {
+        "crash.pdf": "Unable to read PDF. Worker process crashed.",
+        "hang.pdf": "Unable to read PDF. Timed out.",
+    }
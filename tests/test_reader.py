@@ -0,0 +1,73 @@
+import glob
+import os
+import random
+
+import pytest
+from PyPDF2 import PdfReader as pyPdfReader
+from PyPDF2.errors import PdfReadError
+
+from parsers import get_policy_parser
+from parsers.classifier import insurer_classifier
+from parsers.reader import SPECIAL_CHARS_MAPPING, PdfReader
+
+SAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "pdf", "*")))
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "pdf", "2W.pdf")
+
+
+def chained_clean_content(content):
+    """The cleaning clean_content replaced, one copy of the text per step"""
+    content = content.encode("ascii", errors="ignore").decode().translate(SPECIAL_CHARS_MAPPING)
+    return content.replace("&amp;", "&").replace("\xa0", " ").replace("\x18", " ").replace("\x08", " ")
+
+
+def sample_pages(sample):
+    """Raw pypdf text of the pages of sample, skips samples pypdf can't read (GCV.1.PDF is truncated)"""
+    try:
+        return [page.extract_text() for page in pyPdfReader(sample).pages]
+    except PdfReadError as e:
+        pytest.skip(f"{os.path.basename(sample)} can't be read, {e}")
+
+
+def generated_pages(count):
+    rng = random.Random(0)
+    alphabet = [chr(c) for c in range(300)] + ["\ud800", "\udfff", "₹", "&amp;", "&am\x18p;", "&amp;amp;"]
+    return ["".join(rng.choices(alphabet, k=rng.randint(0, 2000))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("sample", SAMPLES, ids=os.path.basename)
+def test_clean_content_matches_chained_cleaning_on_samples(sample):
+    clean_content = PdfReader(None).clean_content
+    for text in sample_pages(sample):
+        assert clean_content(text) == chained_clean_content(text)
+
+
+def test_clean_content_matches_chained_cleaning_on_generated_text():
+    clean_content = PdfReader(None).clean_content
+    for text in generated_pages(500):
+        assert clean_content(text) == chained_clean_content(text)
+
+
+@pytest.mark.parametrize("sample", SAMPLES, ids=os.path.basename)
+def test_page_by_page_detection_matches_whole_content(sample):
+    sample_pages(sample)
+    expected = insurer_classifier.classify(PdfReader(sample).read_file_pypdf())
+    policy = get_policy_parser(sample)
+    assert type(policy) is expected.parser_class
+    assert policy.matched_signature == expected.signature
+
+
+def test_pages_stay_readable_after_close():
+    with PdfReader(SAMPLE) as reader:
+        content = reader.read_file_pypdf()
+        pages = list(reader.pages)
+    assert reader.read_file_pypdf() == content
+    assert list(reader.iter_pages_pypdf()) == reader.pages == pages
+
+
+def test_extracting_more_pages_after_close_raises():
+    with PdfReader(SAMPLE) as reader:
+        first_page = next(reader.iter_pages_pypdf())
+    assert reader.extracted_content == "\n" + first_page
+    with pytest.raises(ValueError):
+        reader.read_file_pypdf()
+    assert reader.pages == [first_page]
@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+from parse_policy import Masters, PolicyParser
+from parsers import get_policy_parser
+from parsers.base import BasePolicyParser
+
+from benchmarks.bench_field_extraction import FIELDS
+from benchmarks.bench_samples import GOLDEN_DIR, PROCESSING_DATE
+
+with open(os.path.join(GOLDEN_DIR, "samples.json")) as golden_file:
+    GOLDEN = json.load(golden_file)
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "pdf")
+
+
+@pytest.fixture(scope="module")
+def parser():
+    Masters.read_branch_master(os.path.join(GOLDEN_DIR, "branches.csv"))
+    return PolicyParser(date=PROCESSING_DATE, files=())
+
+
+@pytest.mark.parametrize("name", sorted(GOLDEN))
+def test_sample_matches_golden_output(parser, name):
+    row, error = parser.parse_file(os.path.join(SAMPLES, name))
+    found = {"row": dict(row)} if error is None else {"error": dict(error, file=name)}
+    assert found == GOLDEN[name]
+
+
+@pytest.mark.parametrize("name", sorted(name for name in GOLDEN if "row" in GOLDEN[name]))
+def test_fields_are_extracted_at_most_once(parser, name):
+    policy = get_policy_parser(os.path.join(SAMPLES, name))
+    assert policy.__class__ is not BasePolicyParser
+
+    # transform_to_saibaa asks for some fields several times, none of them may be extracted twice
+    parser.transform_to_saibaa(policy)
+    for field in FIELDS:
+        getattr(policy, field)()
+    reruns = [[pattern.pattern for pattern in patterns] for patterns, runs in policy.pattern_runs.items() if runs > 1]
+    assert reruns == []
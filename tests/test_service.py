@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+from http import HTTPStatus
+
+import pytest
+
+import service
+from parse_policy import PolicyParser
+from service import HttpError, ParseService
+
+
+def fake_parse_upload(data, name, processing_date):
+    """Stands in for service._parse_upload in the workers, crashing or hanging on request"""
+    if data == b"crash":
+        os._exit(1)
+    if data == b"hang":
+        time.sleep(60)
+    return {"file": name}, None
+
+
+@pytest.fixture
+def parse_service(monkeypatch):
+    monkeypatch.setattr(service, "_parse_upload", fake_parse_upload)
+    monkeypatch.setattr(service, "WORKER_GRACE_SECONDS", 0)
+    kills = []
+    kill_pool = service.kill_pool
+    monkeypatch.setattr(service, "kill_pool", lambda pool: kills.append(pool) or kill_pool(pool))
+
+    parse_service = ParseService(PolicyParser(date="01/15/2024", files=()), workers=2, timeout=1)
+    parse_service.kills = kills
+    yield parse_service
+    parse_service.stop()
+
+
+async def parse(parse_service, data):
+    try:
+        return await parse_service.parse(data, "policy.pdf", "01/15/2024")
+    except HttpError as e:
+        return e.status
+
+
+def test_crash_restarts_the_pool_once(parse_service):
+    async def run():
+        await parse_service.start()
+        pool = parse_service.pool
+        # Every request in the pool fails with the worker that crashed, only one restarts it
+        statuses = await asyncio.gather(*(parse(parse_service, data) for data in [b"crash", b"ok", b"ok"]))
+        assert statuses[0] == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert parse_service.kills == [pool]
+        assert parse_service.pool is not pool
+        assert await parse(parse_service, b"ok") == ({"file": "policy.pdf"}, None)
+
+    asyncio.run(run())
+
+
+def test_timeout_restarts_the_pool(parse_service):
+    async def run():
+        await parse_service.start()
+        pool = parse_service.pool
+        statuses = await asyncio.gather(parse(parse_service, b"hang"), parse(parse_service, b"hang"))
+        assert statuses == [HTTPStatus.GATEWAY_TIMEOUT, HTTPStatus.GATEWAY_TIMEOUT]
+        assert parse_service.kills == [pool]
+        assert await parse(parse_service, b"ok") == ({"file": "policy.pdf"}, None)
+
+    asyncio.run(run())
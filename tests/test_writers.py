@@ -0,0 +1,34 @@
+import csv
+
+import pytest
+from openpyxl import load_workbook
+
+from writers import get_writer
+
+
+def write(path, rows, interrupt=False):
+    with get_writer(path) as writer:
+        writer.add_headers(["Sno", "CustName"])
+        writer.add_rows(rows)
+        if interrupt:
+            raise KeyboardInterrupt
+
+
+def test_interrupted_workbook_leaves_earlier_one(tmp_path):
+    path = tmp_path / "output.xlsx"
+    write(path, [{"Sno": 1, "CustName": "MR A KUMAR"}])
+    with pytest.raises(KeyboardInterrupt):
+        write(path, [{"Sno": 1, "CustName": "MR B SINGH"}], interrupt=True)
+
+    rows = list(load_workbook(path).active.values)
+    assert rows == [("Sno", "CustName"), (1, "MR A KUMAR")]
+    assert [entry.name for entry in tmp_path.iterdir()] == ["output.xlsx"]
+
+
+def test_interrupted_csv_keeps_rows_written(tmp_path):
+    path = tmp_path / "output.csv"
+    with pytest.raises(KeyboardInterrupt):
+        write(path, [{"Sno": 1, "CustName": "MR B SINGH"}], interrupt=True)
+
+    with open(path, newline="") as output:
+        assert list(csv.reader(output)) == [["Sno", "CustName"], ["1", "MR B SINGH"]]
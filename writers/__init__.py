@@ -0,0 +1,22 @@
+import os
+
+from writers.base import DictWriter  # noqa: F401
+from writers.csv_writer import CsvDictWriter
+from writers.excel import ExcelDictWriter
+from writers.jsonl import JsonLinesDictWriter
+
+WRITERS = {
+    "xlsx": ExcelDictWriter,
+    "csv": CsvDictWriter,
+    "jsonl": JsonLinesDictWriter,
+}
+
+DEFAULT_FORMAT = "xlsx"
+
+
+def get_writer(path, output_format=None):
+    """Writer for path, in output_format or else the format its extension names (xlsx if neither)"""
+    if output_format is None:
+        extension = os.path.splitext(str(path))[1].lstrip(".").lower()
+        output_format = extension if extension in WRITERS else DEFAULT_FORMAT
+    return WRITERS[output_format](path)
@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+
+from rows import Row
+
+# Rows collected before they are written out in one go
+ROW_BUFFER = 1000
+
+
+class DictWriter(ABC):
+    """Writes dicts as rows, one column per header, in the order of the headers.
+
+    Subclasses write the buffered rows in ``write_rows``, and open and close their file in ``open``
+    and ``close``. Rows are turned into lists of values as they are added, keys missing from a row
+    are left empty and keys that aren't headers are ignored. A ``Row`` with the same headers as the
+    writer is taken as it is.
+
+        with get_writer("output.xlsx") as writer:
+            writer.add_headers(["Sno", "CustName"])
+            writer.add_row({"Sno": 1, "CustName": "MR A KUMAR"})
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.headers = []
+        self._blanks = []
+        self._row_classes = {}
+        self._rows = []
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.discard()
+            return
+        self.flush()
+        self.close()
+
+    def discard(self):
+        """Close the file after a failure, the rows written so far are kept.
+
+        Writers whose file is only readable once complete drop it instead, see ExcelDictWriter.
+        """
+        self.flush()
+        self.close()
+
+    @abstractmethod
+    def open(self):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+    @abstractmethod
+    def write_headers(self, headers):
+        pass
+
+    @abstractmethod
+    def write_rows(self, rows):
+        """Write a list of rows, each a list of values in header order"""
+
+    def add_headers(self, headers):
+        self.headers = list(headers)
+        self._blanks = [""] * len(self.headers)
+        self._row_classes = {}
+        self.write_headers(self.headers)
+
+    def row_values(self, row):
+        if isinstance(row, Row):
+            same_headers = self._row_classes.get(row.__class__)
+            if same_headers is None:
+                same_headers = self._row_classes[row.__class__] = list(row.HEADERS) == self.headers
+            if same_headers:
+                return row.values
+        return list(map(row.get, self.headers, self._blanks))
+
+    def add_row(self, row):
+        self._rows.append(self.row_values(row))
+        if len(self._rows) >= ROW_BUFFER:
+            self.flush()
+
+    def add_rows(self, rows):
+        for row in rows:
+            self.add_row(row)
+
+    def flush(self):
+        if self._rows:
+            self.write_rows(self._rows)
+            self._rows = []
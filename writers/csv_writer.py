@@ -0,0 +1,20 @@
+import csv
+
+from writers.base import DictWriter
+
+
+class CsvDictWriter(DictWriter):
+    """Writes rows as CSV, every value quoted."""
+
+    def open(self):
+        self._file = open(self.path, "w", newline="")
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_ALL)
+
+    def close(self):
+        self._file.close()
+
+    def write_headers(self, headers):
+        self._writer.writerow(headers)
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
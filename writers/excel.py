@@ -0,0 +1,49 @@
+import os
+
+from writers.base import DictWriter
+
+
+class ExcelDictWriter(DictWriter):
+    """Writes rows as an .xlsx workbook with a single sheet, using openpyxl in write-only mode.
+
+    Write-only worksheets keep their rows in a temporary file rather than in memory, so memory stays
+    the same however many rows are written. Characters XML has no way to represent are dropped.
+
+    A workbook can't be read until it is saved on close, so it is saved to ``<path>.part`` and only
+    renamed to path once complete. A run that fails, is interrupted or is killed leaves any earlier
+    workbook at path as it was, and none of its own rows.
+    """
+
+    def open(self):
+        # Imported here, openpyxl takes longer to import than a small run takes to write
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        self._illegal_characters = ILLEGAL_CHARACTERS_RE
+        self._partial_path = f"{self.path}.part"
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Sheet")
+
+    def close(self):
+        self._workbook.save(self._partial_path)
+        os.replace(self._partial_path, self.path)
+
+    def discard(self):
+        # Nothing is saved, openpyxl removes the temporary file of the closed sheet's rows on exit
+        self._sheet.close()
+        if os.path.exists(self._partial_path):
+            os.remove(self._partial_path)
+
+    def write_headers(self, headers):
+        self.write_rows([headers])
+
+    def write_rows(self, rows):
+        for values in rows:
+            self._sheet.append(list(map(self._cell_value, values)))
+
+    def _cell_value(self, value):
+        if value is None or value == "":
+            return None
+        if isinstance(value, (int, float)):
+            return value
+        return self._illegal_characters.sub("", str(value))
@@ -0,0 +1,23 @@
+import json
+
+from writers.base import DictWriter
+
+
+class JsonLinesDictWriter(DictWriter):
+    """Writes rows as JSON Lines, one object per row with its keys in header order.
+
+    There is no header line, the headers are only used for the keys.
+    """
+
+    def open(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+
+    def write_headers(self, headers):
+        pass
+
+    def write_rows(self, rows):
+        headers = self.headers
+        self._file.write("".join(json.dumps(dict(zip(headers, values))) + "\n" for values in rows))